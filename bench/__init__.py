@@ -0,0 +1,11 @@
+"""
+bench — mesures hors-ligne de translate_products_argos.py (sans Argos, sans réseau).
+
+    python -m bench                                   # tous les cas, fr/en x1, x10
+    python -m bench --scale 1,10,100 --backend sleep --latency-ms 2
+    python -m bench --save-baseline bench/baseline.json
+    python -m bench --baseline bench/baseline.json --fail-over 10
+
+Le backend Argos est remplacé par un traducteur factice déterministe (voir bench.fakes).
+Chaque cas tourne dans un sous-processus : le pic RSS mesuré est celui du cas seul.
+"""
@@ -0,0 +1,269 @@
+"""
+python -m bench : banc d'essai hors-ligne (voir bench/__init__.py).
+
+Cas mesurés (chacun dans un sous-processus, pic RSS propre au cas) :
+  - html          : translate_html_string sur content_short / content_long
+  - glossary      : make_glossary_translate_fn (glossaire de la paire) sur nom, contenus, metas Yoast
+  - type_glossary : apply_type_glossary sur les valeurs TYPE (_attribute3)
+  - sentencizer   : split_sentences('rules') sur les segments réellement envoyés au modèle (noms et
+                    emplacements des squelettes HTML) : coût par segment du découpage sans stanza
+  - product       : translate_product complet (glossaire + TYPE), sans moteur par lots
+  - pipeline      : main() de bout en bout (lecture/écriture en flux, lots, dédup), séquentiel
+  - http          : pipeline avec --backend http contre bench.http_server (même backend factice,
+                    servi dans le processus du cas) : surcoût du client HTTP, keep-alive, concurrence
+Jeux : products_fr.json (fr->en) et products_en.json (en->es), à l'échelle x1, x10, x100
+(copies renumérotées, nom suffixé : les descriptions restent répétées comme dans un vrai catalogue).
+"""
+import argparse, io, json, os, platform, resource, subprocess, sys, tempfile, time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.fakes import BACKENDS, make_build_translator  # noqa: E402
+
+CASES = ("html", "glossary", "type_glossary", "sentencizer", "product", "pipeline", "http")
+DATASETS = {
+    "fr": ("products_fr.json", "fr", "en", "English", "glossary_en.json"),
+    "en": ("products_en.json", "en", "es", "Español", "glossary_es.json"),
+}
+
+# ---------- Données ----------
+def load_products(dataset: str, scale: int) -> List[Dict[str, Any]]:
+    fname = DATASETS[dataset][0]
+    with io.open(os.path.join(ROOT, fname), "r", encoding="utf-8") as f:
+        base = json.load(f)
+    if scale <= 1:
+        return base
+    step = max([p.get("id") or 0 for p in base if isinstance(p.get("id"), int)] + [0]) + 1
+    out = []
+    for k in range(scale):
+        for prod in base:
+            p = json.loads(json.dumps(prod))
+            if k:
+                if isinstance(p.get("id"), int):
+                    p["id"] += k * step
+                if p.get("name"):
+                    p["name"] = f"{p['name']} #{k}"
+                if p.get("slug"):
+                    p["slug"] = f"{p['slug']}-{k}"
+            out.append(p)
+    return out
+
+def _options(dataset: str):
+    _, src, tgt, name, _ = DATASETS[dataset]
+    return argparse.Namespace(source=src, target=tgt, target_name=name, emoji_mode="keep", strip_strong=True,
+                              slug_from_name=True, set_source_id=True, null_id=True, translate_attr_labels=False)
+
+# ---------- Exécution d'un cas (sous-processus) ----------
+def run_case(case: str, dataset: str, scale: int, backend: str, latency_ms: float, repeat: int,
+             input_path: str = "") -> Dict[str, Any]:
+    import translate_products_argos as t
+    t.build_translator = make_build_translator(backend, latency_ms)
+    if case == "pipeline":
+        return _run_pipeline(t, input_path, dataset, repeat)
+    if case == "http":
+        from bench.http_server import start
+        srv = start(backend, latency_ms)
+        try:
+            return _run_pipeline(t, input_path, dataset, repeat, ["--backend", "http", "--endpoint", srv.url])
+        finally:
+            srv.shutdown()
+
+    _, src, tgt, _, gfile = DATASETS[dataset]
+    for key, mapping in t._load_type_glossary_override().items():
+        t.TYPE_GLOSSARY.setdefault(key, {}).update(mapping)
+    glossary = t._load_glossary_from_file(os.path.join(ROOT, gfile))
+    products = load_products(dataset, scale)
+    base_fn = t.build_translator(src, tgt)
+    options = _options(dataset)
+
+    if case == "html":
+        work = [v for p in products for v in (p.get("content_short"), p.get("content_long")) if v]
+        fn = lambda v: t.translate_html_string(v, base_fn, "keep", True)
+    elif case == "glossary":
+        gfn = t.make_glossary_translate_fn(base_fn, glossary, "word")
+        work = [v for p in products for v in (
+            p.get("name"), p.get("content_short"), p.get("content_long"),
+            (p.get("meta") or {}).get("_yoast_wpseo_metadesc"), (p.get("meta") or {}).get("_yoast_wpseo_focuskw"),
+        ) if isinstance(v, str) and v]
+        fn = gfn
+    elif case == "type_glossary":
+        work = [(p.get("meta") or {}).get("_attribute3") for p in products]
+        work = [v for v in work if isinstance(v, str) and v]
+        fn = lambda v: t.apply_type_glossary(v, src, tgt, base_fn)
+    elif case == "sentencizer":
+        work = [p["name"] for p in products if isinstance(p.get("name"), str) and p["name"]]
+        for p in products:
+            for v in (p.get("content_short"), p.get("content_long")):
+                if v:
+                    work.extend(t.html_skeleton(v, "keep", True).slots)
+        fn = lambda v: t.split_sentences(v, "rules")
+    elif case == "product":
+        gfn = t.make_glossary_translate_fn(base_fn, glossary, "word")
+        work = products
+        fn = lambda p: t.translate_product(p, gfn, options)
+    else:
+        raise SystemExit(f"cas inconnu '{case}'")
+
+    chars = sum(len(json.dumps(w, ensure_ascii=False)) if isinstance(w, dict) else len(w) for w in work)
+    best = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        for w in work:
+            fn(w)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return {"items": len(work), "chars": chars, "seconds": best}
+
+def _run_pipeline(t, inp: str, dataset: str, repeat: int, extra: List[str] = ()) -> Dict[str, Any]:
+    """L'entrée est écrite par le processus parent : le pic RSS ne compte que le pipeline en flux."""
+    _, src, tgt, name, gfile = DATASETS[dataset]
+    best = None
+    count = sum(1 for _ in t.iter_products(inp))
+    chars = os.path.getsize(inp)
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        for _ in range(max(1, repeat)):
+            sys.argv = ["translate_products_argos.py", "--source", src, "--target", tgt, "--target-name", name,
+                        "--input", inp, "--output", os.path.join(tmp, "out.json"),
+                        "--glossary-file", os.path.join(ROOT, gfile), "--null-id", "--slug-from-name",
+                        "--set-source-id", "--strip-strong", "--progress", "none", "--no-journal", *extra]
+            t0 = time.perf_counter()
+            t.main()
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+    return {"items": count, "chars": chars, "seconds": best}
+
+def peak_rss_kb() -> int:
+    """
+    Pic RSS du processus en Ko. VmHWM (Linux) appartient à l'espace mémoire courant ; ru_maxrss,
+    lui, peut hériter du pic du parent au travers de fork/exec.
+    """
+    try:
+        with io.open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+# ---------- Orchestration ----------
+def _case_key(case: str, dataset: str, scale: int) -> str:
+    return f"{case}/{dataset}/x{scale}"
+
+def _scaled_input(workdir: str, dataset: str, scale: int) -> str:
+    path = os.path.join(workdir, f"{dataset}_x{scale}.json")
+    if not os.path.isfile(path):
+        with io.open(path, "w", encoding="utf-8") as f:
+            json.dump(load_products(dataset, scale), f, ensure_ascii=False, indent=2)
+    return path
+
+def measure(case: str, dataset: str, scale: int, args, workdir: str) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "bench", "_case", case, dataset, str(scale),
+           "--backend", args.backend, "--latency-ms", str(args.latency_ms), "--repeat", str(args.repeat)]
+    if case in ("pipeline", "http"):
+        cmd += ["--input", _scaled_input(workdir, dataset, scale)]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"[bench] {_case_key(case, dataset, scale)} a échoué :\n{proc.stderr}")
+    res = json.loads(proc.stdout.strip().splitlines()[-1])
+    sec = res["seconds"] or 1e-9
+    res["items_per_s"] = res["items"] / sec
+    res["chars_per_s"] = res["chars"] / sec
+    return res
+
+def _fmt_delta(new: float, old: float) -> str:
+    if not old:
+        return ""
+    return f"{(new / old - 1.0) * 100:+.1f}%"
+
+def _run_all(cases, datasets, scales, args, workdir, baseline, results, regressions):
+    for case in cases:
+        for dataset in datasets:
+            for scale in scales:
+                key = _case_key(case, dataset, scale)
+                res = measure(case, dataset, scale, args, workdir)
+                results[key] = res
+                ref = baseline.get(key)
+                delta = _fmt_delta(res["items_per_s"], ref["items_per_s"]) if ref else ""
+                if ref and args.fail_over and res["items_per_s"] < ref["items_per_s"] * (1 - args.fail_over / 100.0):
+                    regressions.append(key)
+                print(f"{key:<28} {res['items']:>9} {res['seconds']:>9.3f} {res['items_per_s']:>10.1f} "
+                      f"{res['chars_per_s']:>12.0f} {res['peak_rss_kb'] / 1024:>7.1f}MB  {delta}", flush=True)
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "_case":
+        p = argparse.ArgumentParser(prog="bench _case")
+        p.add_argument("case", choices=CASES)
+        p.add_argument("dataset", choices=sorted(DATASETS))
+        p.add_argument("scale", type=int)
+        p.add_argument("--backend", choices=BACKENDS, default="identity")
+        p.add_argument("--latency-ms", type=float, default=1.0)
+        p.add_argument("--repeat", type=int, default=1)
+        p.add_argument("--input", default="")
+        a = p.parse_args(sys.argv[2:])
+        stdout = sys.stdout
+        sys.stdout = sys.stderr  # le script mesuré ne doit pas polluer la sortie JSON
+        res = run_case(a.case, a.dataset, a.scale, a.backend, a.latency_ms, a.repeat, a.input)
+        res["peak_rss_kb"] = peak_rss_kb()
+        stdout.write(json.dumps(res) + "\n")
+        return
+
+    p = argparse.ArgumentParser(prog="python -m bench", description="Banc d'essai hors-ligne de translate_products_argos.py")
+    p.add_argument("--cases", default=",".join(CASES), help=f"Cas à mesurer (parmi {', '.join(CASES)}).")
+    p.add_argument("--datasets", default="fr,en", help="Jeux de données (fr, en).")
+    p.add_argument("--scale", default="1,10", help="Facteurs d'échelle synthétiques (ex: 1,10,100).")
+    p.add_argument("--backend", choices=BACKENDS, default="identity", help="Traducteur factice.")
+    p.add_argument("--latency-ms", type=float, default=1.0, help="Latence par appel du backend 'sleep'.")
+    p.add_argument("--repeat", type=int, default=3, help="Répétitions par cas (meilleur temps retenu).")
+    p.add_argument("--save-baseline", default="", help="Enregistre les résultats comme référence (JSON).")
+    p.add_argument("--baseline", default="", help="Compare aux résultats de référence (JSON).")
+    p.add_argument("--fail-over", type=float, default=0.0,
+                   help="Code de sortie 1 si un cas perd plus de PCT %% de débit face à la référence.")
+    args = p.parse_args()
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    datasets = [d.strip() for d in args.datasets.split(",") if d.strip()]
+    scales = [int(x) for x in args.scale.split(",") if x.strip()]
+    for c in cases:
+        if c not in CASES:
+            raise SystemExit(f"cas inconnu '{c}' (attendu: {', '.join(CASES)})")
+    for d in datasets:
+        if d not in DATASETS:
+            raise SystemExit(f"jeu inconnu '{d}' (attendu: {', '.join(sorted(DATASETS))})")
+
+    baseline = {}
+    if args.baseline:
+        with io.open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    results: Dict[str, Any] = {}
+    regressions = []
+    print(f"{'cas':<28} {'éléments':>9} {'secondes':>9} {'élém./s':>10} {'car./s':>12} {'pic RSS':>9}  référence")
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    try:
+        _run_all(cases, datasets, scales, args, workdir, baseline, results, regressions)
+    finally:
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        doc = {
+            "saved": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "latency_ms": args.latency_ms,
+            "results": results,
+        }
+        with io.open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        print(f"[bench] référence enregistrée : {args.save_baseline}")
+    if regressions:
+        print(f"[bench] régression > {args.fail_over}% : {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
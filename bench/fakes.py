@@ -0,0 +1,44 @@
+"""
+Backends factices déterministes, substituables à translate_products_argos.build_translator.
+  - identity : renvoie le texte tel quel (coût MT nul : mesure le pur surcoût du script)
+  - reverse  : renvoie le texte inversé (sortie différente de l'entrée, même longueur)
+  - sleep    : identité + latence fixe par appel (simule un modèle, --latency-ms)
+"""
+import time
+from typing import Callable, List
+
+BACKENDS = ("identity", "reverse", "sleep")
+
+def make_build_translator(kind: str = "identity", latency_ms: float = 1.0):
+    """Renvoie une fonction de même signature que build_translator(src, tgt, sentencizer=...)."""
+    if kind not in BACKENDS:
+        raise ValueError(f"backend factice inconnu '{kind}' (attendu: {', '.join(BACKENDS)})")
+    delay = max(0.0, float(latency_ms)) / 1000.0
+
+    def build_translator(src_code: str, tgt_code: str, **options) -> Callable[[str], str]:
+        calls = {"n": 0}
+
+        def _translate(text: str) -> str:
+            if not text or not text.strip():
+                return text
+            calls["n"] += 1
+            if kind == "reverse":
+                return text[::-1]
+            if kind == "sleep":
+                time.sleep(delay)
+            return text
+
+        def _translate_batch(texts: List[str]) -> List[str]:
+            # un seul "aller-retour" par lot, comme un vrai backend batché
+            if kind == "sleep" and any(t and t.strip() for t in texts):
+                time.sleep(delay)
+                calls["n"] += 1
+                return list(texts)
+            return [_translate(t) for t in texts]
+
+        _translate.translate_batch = _translate_batch
+        _translate.calls = calls
+        _translate.model_id = f"bench:{kind}:{src_code}->{tgt_code}"
+        return _translate
+
+    return build_translator
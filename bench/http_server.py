@@ -0,0 +1,115 @@
+"""
+Serveur factice compatible LibreTranslate, pour le backend --backend http sans vrai serveur :
+
+    python -m bench.http_server --port 5000 --backend reverse --latency-ms 20
+    python translate_products_argos.py ... --backend http --endpoint http://127.0.0.1:5000
+
+POST /translate (JSON ou formulaire ; "q" chaîne ou liste) -> {"translatedText": ...}, traduit par
+les backends de bench.fakes (une latence par requête pour 'sleep'). HTTP/1.1 keep-alive, un thread
+par connexion. --fail-every N répond 503 à une requête sur N (exercice des reprises côté client).
+"""
+import argparse, json, socket, sys, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs
+
+from bench.fakes import BACKENDS, make_build_translator
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # en-têtes et corps partent en deux écritures : sans TCP_NODELAY, Nagle + ACK retardé = ~40 ms/requête
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, fmt, *args):  # silencieux : le banc mesure, il ne journalise pas
+        pass
+
+    def _reply(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/languages":
+            return self._reply(200, [])
+        self._reply(404, {"error": "Not Found"})
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.rstrip("/") != "/translate":
+            return self._reply(404, {"error": "Not Found"})
+        srv = self.server
+        with srv.lock:
+            srv.requests += 1
+            fail = srv.fail_every and srv.requests % srv.fail_every == 0
+        if fail:
+            return self._reply(503, {"error": "Service temporairement indisponible (simulé)"})
+        try:
+            if (self.headers.get("Content-Type") or "").startswith("application/json"):
+                data = json.loads(raw.decode("utf-8"))
+            else:
+                data = {k: (v if k == "q" and len(v) > 1 else v[0]) for k, v in parse_qs(raw.decode("utf-8")).items()}
+        except ValueError:
+            return self._reply(400, {"error": "Corps de requête invalide"})
+        q, src, tgt = data.get("q"), data.get("source"), data.get("target")
+        if q is None or not src or not tgt:
+            return self._reply(400, {"error": "Paramètres requis : q, source, target"})
+        fn = srv.translator(src, tgt)
+        if isinstance(q, list):
+            return self._reply(200, {"translatedText": fn.translate_batch([str(x) for x in q])})
+        self._reply(200, {"translatedText": fn(str(q))})
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr: Tuple[str, int], kind: str = "identity", latency_ms: float = 1.0, fail_every: int = 0):
+        super().__init__(addr, _Handler)
+        self.build = make_build_translator(kind, latency_ms)
+        self.fail_every = max(0, fail_every)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._pairs = {}
+
+    def translator(self, src: str, tgt: str):
+        with self.lock:
+            if (src, tgt) not in self._pairs:
+                self._pairs[(src, tgt)] = self.build(src, tgt)
+            return self._pairs[(src, tgt)]
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start(kind: str = "identity", latency_ms: float = 1.0, fail_every: int = 0, host: str = "127.0.0.1",
+          port: int = 0) -> StandInServer:
+    """Démarre le serveur dans un thread démon (port 0 : port libre) ; server.shutdown() pour l'arrêter."""
+    srv = StandInServer((host, port), kind, latency_ms, fail_every)
+    threading.Thread(target=srv.serve_forever, name="bench-http", daemon=True).start()
+    return srv
+
+def main():
+    p = argparse.ArgumentParser(prog="python -m bench.http_server",
+                                description="Serveur factice compatible LibreTranslate (backend http).")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=5000)
+    p.add_argument("--backend", choices=BACKENDS, default="identity")
+    p.add_argument("--latency-ms", type=float, default=1.0)
+    p.add_argument("--fail-every", type=int, default=0, help="Répond 503 à une requête sur N (0 = jamais).")
+    a = p.parse_args()
+    srv = StandInServer((a.host, a.port), a.backend, a.latency_ms, a.fail_every)
+    print(f"[bench.http_server] {a.backend} sur {srv.url}", file=sys.stderr, flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,28 @@ translate_products_argos.py
  - Barre de progression simple (--progress auto)
  - Option --strip-strong pour retirer <strong>...</strong> avant traduction
  - ✅ Traduit aussi les attributs (meta & tax al_product-attributes)
+ - Mémoire de traduction persistante SQLite (--tm-file, --tm-readonly, --tm-max-entries)
+ - Mode incrémental (--incremental --previous-output) : réutilise les produits inchangés
+ - Normalisation HTML dans la même passe (--normalize-html) : <p> dans <li>, balises pendantes, <strong> vides
+ - Manifeste des changements (--changeset) : l'importeur WP-CLI saute les produits inchangés sans requête
+ - Table des attributs (--attr-map) : valeurs distinctes -> traductions, termes créés en un lot par l'importeur
+ - Moteur deux passes : segments collectés, dédupliqués puis traduits par lots (--batch-size, --chunk-size)
+ - Traduction multi-process ordonnée (--workers N), sortie identique au mode séquentiel
+ - Lecture/écriture en flux (mémoire constante), JSON Lines si l'extension est .jsonl/.ndjson
+ - Journal de reprise fsync'é par lot + --resume ; sortie remplacée atomiquement en fin de run
+ - Multi-cibles en un seul passage : --target en,es:via=en --output products_{lang}.json
+ - Ordonnanceur à budget (--deadline, --max-chars) : champs prioritaires de tout le catalogue d'abord, reste différé
+ - Politique des clés META (--meta-policy) : translate / translate-html / copy / drop par clé, préfixe ou regex
+ - Dédup des segments sur tout le run (--dedup-max-entries) + rapport des répétitions (--dedup-report N)
+ - Rapport de run JSON (--report : débits, latences p50/p95, étapes chronométrées) et dump cProfile (--profile)
+ - Découpage en phrases sélectionnable (--sentencizer stanza|rules|none) : rules/none contournent stanza
+ - Backend CTranslate2 direct (--backend ct2 : --compute-type int8, --beam-size, threads, échauffement)
+ - Masquage nombres / unités / références (--mask-tokens, --mask-pattern) : segments partagés par la dédup et la TM
+ - Pré-filtre « rien à traduire » (--prefilter, --prefilter-field, --brand-file) : codes, URL, marques, texte déjà cible
+ - Backend HTTP LibreTranslate (--backend http --endpoint) : asyncio, keep-alive, concurrence bornée, reprises
+ - Démon résident (--serve --daemon-socket) : modèles gardés en mémoire, clients sans chargement Argos
+ - Schéma produit validé à la lecture ; JSON via orjson s'il est installé, --output-format pretty|compact
+ - Découpe HTML/emojis en un squelette (littéraux + emplacements) calculé une fois par champ et mis en cache
 
 Entrée:  JSON (array) avec des objets type:
 {
@@ -24,13 +46,258 @@ Entrée:  JSON (array) avec des objets type:
 }
 
 Sortie: même structure, avec champs traduits et options appliquées.
+(Entrée/sortie .jsonl : un produit par ligne.)
 """
 
-import argparse, json, io, re, sys, unicodedata, os
-from typing import Any, Dict, List, Callable
+import argparse, json, io, re, sys, unicodedata, os, hashlib, sqlite3, time, itertools, copy, functools, math
+import signal, socket, socketserver, threading
+from typing import Any, Dict, List, Callable, Tuple
+
+# ---------- Profilage (--report / --profile) ----------
+class RunProfiler:
+    """
+    Chronos et compteurs par étape, un par processus ; inactif (un test par appel) sans --report.
+    Les temps sont inclusifs : 'html' contient 'glossary', 'backend'...
+    checkpoint() renvoie les mesures depuis l'appel précédent (remontées des workers à chaque lot).
+    """
+    def __init__(self):
+        self.enabled = False
+        self.muted = False  # passe de collecte du moteur par lots : champs non comptés (revus au rendu)
+        self.reset()
+
+    def reset(self):
+        self.stages: Dict[str, List[float]] = {}
+        self.fields: Dict[str, int] = {}
+        self.latencies: List[float] = []
+        self.segments = 0
+        self.chars = 0
+
+    def add(self, stage: str, seconds: float, calls: int = 1):
+        st = self.stages.get(stage)
+        if st is None:
+            st = self.stages[stage] = [0, 0.0]
+        st[0] += calls
+        st[1] += seconds
+
+    def call(self, stage: str, fn, *a, **kw):
+        if not self.enabled:
+            return fn(*a, **kw)
+        t0 = time.perf_counter()
+        try:
+            return fn(*a, **kw)
+        finally:
+            self.add(stage, time.perf_counter() - t0)
+
+    def field(self, name: str, text: Any):
+        """Caractères envoyés à la traduction pour un champ produit."""
+        if self.enabled and not self.muted and isinstance(text, str):
+            self.fields[name] = self.fields.get(name, 0) + len(text)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        snap = {"stages": self.stages, "fields": self.fields, "latencies": self.latencies,
+                "segments": self.segments, "chars": self.chars}
+        self.reset()
+        return snap
+
+    def absorb(self, snap: Dict[str, Any]):
+        """Cumule un checkpoint (latences exclues : rattachées aux produits par l'appelant)."""
+        for stage, (calls, seconds) in snap["stages"].items():
+            self.add(stage, seconds, calls)
+        for name, n in snap["fields"].items():
+            self.fields[name] = self.fields.get(name, 0) + n
+        self.segments += snap["segments"]
+        self.chars += snap["chars"]
+
+_PROF = RunProfiler()
+
+def _profiled(stage: str):
+    """Décorateur : chronomètre la fonction sous le nom d'étape `stage` quand le profilage est actif."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not _PROF.enabled:
+                return fn(*a, **kw)
+            t0 = time.perf_counter()
+            try:
+                return fn(*a, **kw)
+            finally:
+                _PROF.add(stage, time.perf_counter() - t0)
+        return wrapper
+    return deco
+
+def _profiled_backend(translate_fn: Callable[[str], str]) -> Callable[[str], str]:
+    """Chronomètre le backend et compte segments/caractères, en conservant translate_batch et model_id."""
+    def translate_timed(text: str) -> str:
+        t0 = time.perf_counter()
+        res = translate_fn(text)
+        _PROF.add("backend", time.perf_counter() - t0)
+        _PROF.segments += 1
+        _PROF.chars += len(text or "")
+        return res
+
+    batch = getattr(translate_fn, "translate_batch", None)
+    if batch is not None:
+        def translate_batch_timed(texts: List[str]) -> List[str]:
+            t0 = time.perf_counter()
+            res = batch(texts)
+            _PROF.add("backend", time.perf_counter() - t0, len(texts))
+            _PROF.segments += len(texts)
+            _PROF.chars += sum(len(t or "") for t in texts)
+            return res
+        translate_timed.translate_batch = translate_batch_timed
+    translate_timed.model_id = getattr(translate_fn, "model_id", "")
+    return translate_timed
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # rang le plus proche (nearest-rank)
+    rank = min(len(sorted_values), max(1, math.ceil(pct / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+# ---------- Découpage en phrases (--sentencizer) ----------
+# stanza : découpage d'Argos (pipeline stanza recréé à chaque appel, coûteux) ;
+# rules  : regex ci-dessous, puis segments envoyés directement au modèle CTranslate2 ;
+# none   : chaque paragraphe tel quel (les nœuds texte du HTML sont déjà courts).
+SENTENCIZERS = ("stanza", "rules", "none")
+
+# Mots suivis d'un point qui ne terminent pas une phrase (fr/en/es, minuscules, sans le point)
+_SBD_ABBREVIATIONS = frozenset((
+    "m", "mm", "mme", "mmes", "mlle", "mlles", "dr", "pr", "me", "st", "ste", "etc", "cf", "env", "approx",
+    "ex", "p", "pp", "réf", "ref", "art", "n", "no", "nº", "n°", "vol", "chap", "fig", "tél", "tel", "mod",
+    "av", "bd", "éd", "coll", "qté", "mr", "mrs", "ms", "jr", "sr", "prof", "inc", "ltd", "co", "corp",
+    "vs", "dept", "incl", "sra", "srta", "ud", "uds", "dra", "lic", "ing", "cía", "pág", "núm", "aprox",
+))
+# fin de phrase candidate : ponctuation finale (+ guillemets/parenthèses fermants, « Bonjour. » compris)
+# puis blancs
+_SBD_RE = re.compile(r"[.!?…]+(?:\s?[\"'»”’)\]])*\s+")
+_SBD_WORD_RE = re.compile(r"(\S+?)\.+$")
+_SBD_OPENERS = "¿¡«\"“‘(["
+
+def split_sentences(text: str, mode: str = "rules") -> List[str]:
+    """
+    Découpe un paragraphe en phrases. 'rules' ne coupe qu'avant une majuscule (éventuellement
+    précédée de ¿ ¡ « ou d'une parenthèse), jamais après une abréviation connue, une initiale
+    ("J. Dupont") ou un sigle pointé ("U.S.") ; une unité après un nombre ("2000 W. Le...") termine
+    bien la phrase, un nombre après le point ("Réf. 80735", "2000 W. 220 V") ne la termine pas.
+    """
+    if mode == "none" or not text:
+        return [text]
+    out: List[str] = []
+    start = 0
+    for m in _SBD_RE.finditer(text):
+        nxt = text[m.end():m.end() + 2].lstrip(_SBD_OPENERS)[:1]
+        if not nxt or not nxt.isupper():
+            continue
+        punct = m.group(0).rstrip()
+        if punct.rstrip("\"'»”’)] ").endswith(".") and not punct.startswith(("..", "…")):
+            w = _SBD_WORD_RE.search(text, start, m.start() + 1)
+            word = w.group(1).lstrip("(«\"“'") if w else ""
+            if "." in word or word.lower() in _SBD_ABBREVIATIONS:
+                continue  # sigle pointé ou abréviation
+            if len(word) == 1 and word.isupper():
+                before = text[max(start, w.start(1) - 2):w.start(1)]
+                if not (before[-1:] == " " and before[:1].isdigit()):
+                    continue  # initiale ; une lettre après un nombre est une unité (2000 W.)
+        out.append(text[start:m.start() + len(punct)])
+        start = m.end()
+    out.append(text[start:])
+    return [t for t in out if t]
+
+def _sentencepiece_codec(model_path: str):
+    """(encode, decode) SentencePiece, comme les paquets Argos sans objet tokenizer."""
+    try:
+        import sentencepiece
+    except Exception as e:
+        raise RuntimeError("SentencePiece n'est pas installé: pip install sentencepiece") from e
+    sp = sentencepiece.SentencePieceProcessor(model_file=model_path)
+    return (lambda s: sp.encode(s, out_type=str)), (lambda toks: "".join(toks).replace("▁", " "))
+
+def _ct2_translate_fn(get_model: Callable[[], Any], encode, decode, target_prefix: str, sentencizer: str,
+                      **decode_options) -> Callable[[str], str]:
+    """
+    Traduction sur un modèle CTranslate2 : paragraphes (une ligne chacun, lignes vides conservées),
+    phrases (split_sentences), tokenizer, translate_batch, retrait du préfixe cible. Tous les
+    paragraphes d'un lot partent en un seul appel. decode_options : beam_size, max_decoding_length...
+    """
+    decode_options = dict(dict(replace_unknowns=True, max_batch_size=32, beam_size=4, num_hypotheses=1,
+                               length_penalty=0.2), **decode_options)
+
+    def translate_paragraphs(paragraphs: List[str]) -> List[str]:
+        spans, tokenized = [], []
+        for para in paragraphs:
+            sentences = split_sentences(para, sentencizer)
+            spans.append((len(tokenized), len(tokenized) + len(sentences)))
+            tokenized.extend(encode(s) for s in sentences)
+        if not tokenized:
+            return list(paragraphs)
+        results = get_model().translate_batch(
+            tokenized,
+            target_prefix=[[target_prefix]] * len(tokenized) if target_prefix else None,
+            **decode_options
+        )
+        hyps = [r.hypotheses[0] if hasattr(r, "hypotheses") else r[0]["tokens"] for r in results]
+        out = []
+        for a, b in spans:
+            value = decode([tok for h in hyps[a:b] for tok in h])
+            if target_prefix and value.startswith(target_prefix):
+                value = value[len(target_prefix):]
+            out.append(value[1:] if value[:1] == " " else value)
+        return out
+
+    def _translate_batch(texts: List[str]) -> List[str]:
+        lines = [text.split("\n") if text else [] for text in texts]
+        todo = [ln for ls in lines for ln in ls if ln.strip()]
+        done = iter(translate_paragraphs(todo))
+        return ["\n".join(next(done) if ln.strip() else ln for ln in ls) if text else text
+                for text, ls in zip(texts, lines)]
+
+    def _translate(text: str) -> str:
+        if not text:
+            return text
+        return _translate_batch([text])[0]
+    _translate.translate_batch = _translate_batch
+    return _translate
+
+def _argos_direct(tr, sentencizer: str):
+    """
+    Traduction Argos sans son découpage stanza : on refait apply_packaged_translation (mêmes
+    réglages de décodage, même modèle CTranslate2 paresseux) avec split_sentences.
+    None si cette version d'Argos n'expose pas le nécessaire.
+    """
+    pkg = getattr(tr, "pkg", None)
+    package_path = getattr(pkg, "package_path", None)
+    if pkg is None or package_path is None:
+        return None
+    try:
+        import ctranslate2
+    except Exception:
+        return None
+    tokenizer = getattr(pkg, "tokenizer", None)
+    if tokenizer is not None and hasattr(tokenizer, "encode") and hasattr(tokenizer, "decode"):
+        encode, decode = tokenizer.encode, tokenizer.decode
+    else:
+        sp_path = os.path.join(str(package_path), "sentencepiece.model")
+        if not os.path.isfile(sp_path):
+            return None
+        try:
+            encode, decode = _sentencepiece_codec(sp_path)
+        except RuntimeError:
+            return None
+
+    def model():
+        ct2 = getattr(tr, "translator", None)
+        if ct2 is None:  # même construction paresseuse qu'Argos, partagée avec tr.translate
+            from argostranslate import settings
+            ct2 = ctranslate2.Translator(os.path.join(str(package_path), "model"), device=settings.device,
+                                         inter_threads=settings.inter_threads, intra_threads=settings.intra_threads)
+            tr.translator = ct2
+        return ct2
+
+    return _ct2_translate_fn(model, encode, decode, getattr(pkg, "target_prefix", "") or "", sentencizer)
 
 # ---------- Argos Translate ----------
-def build_translator(src_code: str, tgt_code: str) -> Callable[[str], str]:
+def build_translator(src_code: str, tgt_code: str, sentencizer: str = "stanza") -> Callable[[str], str]:
     try:
         import argostranslate.package as argos_package  # noqa: F401
         import argostranslate.translate as argos_translate
@@ -59,15 +326,812 @@ def build_translator(src_code: str, tgt_code: str) -> Callable[[str], str]:
             raise
         tr = cand
 
+    model_id = _argos_model_id(src, tgt, tr)
+    if sentencizer != "stanza":
+        direct = _argos_direct(tr, sentencizer)
+        if direct is not None:
+            # découpage différent => traductions différentes : clé de mémoire/empreinte distincte
+            direct.model_id = f"{model_id}+sbd={sentencizer}"
+            direct.backend_info = {"backend": "argos", "model_id": direct.model_id, "sentencizer": sentencizer}
+            return direct
+        sys.stderr.write(f"[WARN] --sentencizer {sentencizer} indisponible pour {src_code}->{tgt_code} "
+                         "(paquet Argos sans modèle CTranslate2 direct) : découpage stanza d'Argos.\n")
+
     def _translate(text: str) -> str:
         if not text:
             return text
         return tr.translate(text)
+    _translate.model_id = model_id
+    _translate.backend_info = {"backend": "argos", "model_id": model_id, "sentencizer": "stanza"}
     return _translate
 
+def _argos_model_id(src, tgt, tr) -> str:
+    """Identifiant stable du modèle (paire + version du paquet Argos), utilisé comme clé de cache."""
+    pkg = getattr(tr, "pkg", None)
+    pkg_version = str(getattr(pkg, "package_version", "") or "")
+    if not pkg_version:
+        try:
+            from importlib.metadata import version
+            pkg_version = "argostranslate-" + version("argostranslate")
+        except Exception:
+            pkg_version = "unknown"
+    return f"argos:{getattr(src, 'code', '?')}->{getattr(tgt, 'code', '?')}:{pkg_version}"
+
+# ---------- CTranslate2 direct (--backend ct2) ----------
+# Pilote le modèle CTranslate2 et le SentencePiece d'un paquet Argos installé, sans importer
+# argostranslate (ni stanza) : type de calcul, threads, faisceau et longueur max réglables.
+BACKENDS = ("argos", "ct2", "http")
+COMPUTE_TYPES = ("default", "int8", "int16", "float32")
+
+def _argos_packages_dir() -> str:
+    """Même emplacement qu'Argos : $ARGOS_PACKAGES_DIR, sinon $XDG_DATA_HOME/argos-translate/packages."""
+    env = os.environ.get("ARGOS_PACKAGES_DIR")
+    if env:
+        return env
+    data = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data, "argos-translate", "packages")
+
+def find_argos_package(src_code: str, tgt_code: str) -> Tuple[str, Dict[str, Any]]:
+    """Renvoie (dossier, metadata.json) du paquet Argos installé pour src->tgt."""
+    root = _argos_packages_dir()
+    names = sorted(os.listdir(root)) if os.path.isdir(root) else []
+    for name in names:
+        try:
+            with io.open(os.path.join(root, name, "metadata.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if (str(meta.get("from_code", "")).lower().startswith(src_code.lower())
+                and str(meta.get("to_code", "")).lower().startswith(tgt_code.lower())):
+            return os.path.join(root, name), meta
+    raise RuntimeError(f"Aucun paquet Argos {src_code}->{tgt_code} dans '{root}' (ARGOS_PACKAGES_DIR). "
+                       "Installez le paquet correspondant.")
+
+def build_ct2_translator(src_code: str, tgt_code: str, sentencizer: str = "rules", compute_type: str = "default",
+                         beam_size: int = 4, inter_threads: int = 1, intra_threads: int = 0,
+                         max_decoding_length: int = 256, warmup: bool = True,
+                         lazy: bool = False) -> Callable[[str], str]:
+    """
+    lazy : modèle chargé (et chauffé) au premier appel seulement. Sert au processus principal en
+    mode --workers, qui n'a besoin que de model_id/backend_info (load_s/warmup_s restent à None).
+    """
+    try:
+        import ctranslate2
+    except Exception as e:
+        raise RuntimeError("CTranslate2 n'est pas installé: pip install ctranslate2 sentencepiece") from e
+    pkg_dir, meta = find_argos_package(src_code, tgt_code)
+    sp_path = os.path.join(pkg_dir, "sentencepiece.model")
+    if not os.path.isfile(sp_path):
+        raise RuntimeError(f"Paquet '{pkg_dir}' sans sentencepiece.model : non pris en charge par --backend ct2.")
+    encode, decode = _sentencepiece_codec(sp_path)
+    version = meta.get("package_version") or "unknown"
+    # réglages qui changent la sortie => dans model_id (mémoire de traduction, empreintes) ; threads non
+    model_id = (f"ct2:{meta.get('from_code', src_code)}->{meta.get('to_code', tgt_code)}:{version}:"
+                f"{compute_type}:beam{beam_size}:len{max_decoding_length}+sbd={sentencizer}")
+    info = {
+        "backend": "ct2", "model_id": model_id, "package": pkg_dir, "compute_type": compute_type,
+        "beam_size": beam_size, "max_decoding_length": max_decoding_length, "sentencizer": sentencizer,
+        "inter_threads": inter_threads, "intra_threads": intra_threads,
+        "load_s": None, "warmup_s": None,
+    }
+    loaded: List[Any] = []
+
+    def model():
+        if not loaded:
+            t0 = time.perf_counter()
+            loaded.append(ctranslate2.Translator(os.path.join(pkg_dir, "model"),
+                                                 device=os.environ.get("ARGOS_DEVICE_TYPE", "cpu"),
+                                                 compute_type=compute_type, inter_threads=inter_threads,
+                                                 intra_threads=intra_threads))
+            info["load_s"] = time.perf_counter() - t0
+            info["warmup_s"] = 0.0
+            if warmup:
+                # première passe hors mesure : allocation des tampons, chargement paresseux des poids
+                t0 = time.perf_counter()
+                fn("Warm-up.")
+                info["warmup_s"] = time.perf_counter() - t0
+        return loaded[0]
+
+    fn = _ct2_translate_fn(model, encode, decode, meta.get("target_prefix") or "", sentencizer,
+                           beam_size=beam_size, max_decoding_length=max_decoding_length)
+    fn.model_id = model_id
+    fn.backend_info = info
+    if not lazy:
+        model()
+    return fn
+
+# ---------- Backend HTTP (--backend http : API LibreTranslate) ----------
+class HttpTranslator:
+    """
+    Client d'un serveur compatible LibreTranslate (POST /translate, plusieurs "q" par requête).
+    Boucle asyncio dédiée (thread démon, recréée après un fork) : connexions HTTP/1.1 keep-alive
+    réutilisées d'un lot à l'autre, au plus `concurrency` requêtes en vol, erreurs réseau / 429 / 5xx
+    retentées avec une attente exponentielle. Même interface qu'un traducteur build_translator.
+    """
+    def __init__(self, endpoint: str, src_code: str, tgt_code: str, api_key: str = "", concurrency: int = 4,
+                 max_q: int = 16, retries: int = 3, timeout: float = 30.0, backoff: float = 0.5):
+        from urllib.parse import urlsplit
+        u = urlsplit(endpoint if "://" in endpoint else "http://" + endpoint)
+        if u.scheme not in ("http", "https") or not u.hostname:
+            raise RuntimeError(f"--endpoint invalide '{endpoint}' (attendu: http://hôte:port).")
+        self.endpoint = endpoint
+        self.src, self.tgt = src_code, tgt_code
+        self.host, self.ssl = u.hostname, u.scheme == "https"
+        self.port = u.port or (443 if self.ssl else 80)
+        self.host_header = u.netloc.rpartition("@")[2]
+        path = u.path.rstrip("/")
+        self.path = path if path.endswith("/translate") else path + "/translate"
+        self.api_key = api_key
+        self.concurrency = max(1, concurrency)
+        self.max_q = max(1, max_q)
+        self.retries = max(0, retries)
+        self.timeout = timeout
+        self.backoff = backoff
+        self.model_id = f"http:{u.scheme}://{self.host_header}{self.path}:{src_code}->{tgt_code}"
+        self.backend_info = {"backend": "http", "model_id": self.model_id, "endpoint": endpoint,
+                             "concurrency": self.concurrency, "q_per_request": self.max_q,
+                             "retries": self.retries, "timeout_s": timeout}
+        self._loop = None
+        self._pid = None
+
+    # -- boucle asyncio (thread dédié)
+    def _run(self, coro_fn, *args):
+        import asyncio
+        if self._loop is None or self._pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="http-backend", daemon=True).start()
+            self._loop, self._pid = loop, os.getpid()
+            self._idle: List[Tuple[Any, Any]] = []
+            self._sem = None
+        return asyncio.run_coroutine_threadsafe(coro_fn(*args), self._loop).result()
+
+    async def _roundtrip(self, conn, body: bytes):
+        reader, writer = conn
+        head = (f"POST {self.path} HTTP/1.1\r\nHost: {self.host_header}\r\nContent-Type: application/json\r\n"
+                f"Accept: application/json\r\nContent-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n")
+        writer.write(head.encode("ascii") + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connexion fermée par le serveur")
+        version, status = status_line.split(None, 2)[:2]
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip()
+        keep = version == b"HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b"".join(chunks)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data, keep = await reader.read(), False
+        return int(status), data, keep
+
+    async def _request(self, body: bytes):
+        import asyncio
+        async with self._sem:
+            # connexion keep-alive fermée entre-temps par le serveur : une seule reprise, sur une neuve
+            for fresh in ((False, True) if self._idle else (True,)):
+                # connexion bornée elle aussi par --http-timeout (hôte muet, SYN perdus)
+                conn = (await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl or None),
+                                               self.timeout)) if fresh else self._idle.pop()
+                try:
+                    status, data, keep = await asyncio.wait_for(self._roundtrip(conn, body), self.timeout)
+                except (OSError, EOFError, ValueError, asyncio.TimeoutError):
+                    conn[1].close()
+                    if fresh:
+                        raise
+                    continue
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return status, data
+
+    async def _post(self, texts: List[str]) -> List[str]:
+        import asyncio
+        payload = {"q": texts, "source": self.src, "target": self.tgt, "format": "text"}
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        body = _dumps_compact(payload).encode("utf-8")
+        err = ""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                status, data = await self._request(body)
+            except (OSError, EOFError, ValueError, asyncio.TimeoutError) as e:
+                err = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                continue
+            if status == 200:
+                try:
+                    out = _loads(data.decode("utf-8")).get("translatedText")
+                except (ValueError, AttributeError):
+                    out = None
+                if isinstance(out, str):
+                    out = [out]
+                if not isinstance(out, list) or len(out) != len(texts):
+                    raise RuntimeError(f"Réponse inattendue de {self.endpoint}: {data[:200]!r}")
+                return out
+            try:
+                msg = _loads(data.decode("utf-8")).get("error") or ""
+            except (ValueError, AttributeError):
+                msg = data[:200].decode("utf-8", "replace")
+            err = f"HTTP {status} {msg}".strip()
+            if status != 429 and status < 500:
+                break  # requête refusée (clé, langue...) : inutile de réessayer
+        raise RuntimeError(f"Backend HTTP {self.endpoint} ({self.src}->{self.tgt}) : {err}")
+
+    async def _translate_all(self, texts: List[str]) -> List[str]:
+        import asyncio
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        chunks = [texts[i:i + self.max_q] for i in range(0, len(texts), self.max_q)]
+        results = await asyncio.gather(*(self._post(c) for c in chunks))
+        return [t for r in results for t in r]
+
+    # -- interface traducteur
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        out = list(texts)
+        idx = [i for i, t in enumerate(out) if t and t.strip()]
+        if idx:
+            for i, tr in zip(idx, self._run(self._translate_all, [out[i] for i in idx])):
+                out[i] = tr
+        return out
+
+    def __call__(self, text: str) -> str:
+        if not text or not text.strip():
+            return text
+        return self.translate_batch([text])[0]
+
+def _resolve_sentencizer(options) -> str:
+    """--sentencizer vide : stanza avec Argos, rules avec ct2 (qui n'embarque pas stanza)."""
+    sentencizer = getattr(options, "sentencizer", "") or ""
+    if getattr(options, "backend", "argos") == "ct2":
+        if sentencizer == "stanza":
+            raise RuntimeError("--backend ct2 découpe lui-même les phrases : --sentencizer rules ou none.")
+        return sentencizer or "rules"
+    return sentencizer or "stanza"
+
+def build_backend(options, lazy: bool = False) -> Callable[[str], str]:
+    """
+    Backend d'une étape : démon résident si --daemon-socket, serveur HTTP, sinon Argos ou CTranslate2
+    chargé ici. lazy : modèle CTranslate2 chargé au premier appel (Argos l'est toujours).
+    """
+    sock = getattr(options, "daemon_socket", "")
+    if sock:
+        # le démon applique son propre --backend ; découpage vide = défaut de ce backend
+        return build_daemon_translator(sock, options.source, options.target, getattr(options, "sentencizer", ""))
+    if getattr(options, "backend", "argos") == "http":
+        # le serveur découpe lui-même : --sentencizer sans effet
+        return HttpTranslator(options.endpoint, options.source, options.target, api_key=options.api_key,
+                              concurrency=options.http_concurrency, max_q=options.http_batch,
+                              retries=options.http_retries, timeout=options.http_timeout)
+    sentencizer = _resolve_sentencizer(options)
+    if getattr(options, "backend", "argos") == "ct2":
+        return build_ct2_translator(options.source, options.target, sentencizer,
+                                    compute_type=options.compute_type, beam_size=options.beam_size,
+                                    inter_threads=options.inter_threads, intra_threads=options.intra_threads,
+                                    max_decoding_length=options.max_decoding_length,
+                                    warmup=not options.no_warmup, lazy=lazy)
+    return build_translator(options.source, options.target, sentencizer=sentencizer)
+
+# ---------- Démon de traduction (--serve / --daemon-socket) ----------
+# Protocole : une requête JSON par ligne sur un socket Unix, une réponse par ligne.
+#   {"op": "ping"}                                          -> {"ok": true, "pairs": ["fr->en", ...]}
+#   {"op": "model", "src": "fr", "tgt": "en"}               -> {"ok": true, "model_id": "..."}
+#   {"op": "translate", "src": .., "tgt": .., "texts": [..]} -> {"ok": true, "texts": [...]}
+#   ("sentencizer": "rules" facultatif sur model/translate : un modèle chargé par découpage)
+#   erreur                                                  -> {"ok": false, "error": "..."}
+class TranslationDaemon:
+    """
+    Garde les modèles chargés (un par paire, chargé à la première demande ou au démarrage) et sert
+    les clients en parallèle : un thread par connexion, une file (verrou) par modèle. Deux paires
+    différentes traduisent en même temps, deux requêtes sur la même paire passent l'une après l'autre.
+    """
+    def __init__(self, socket_path: str, options=None):
+        self.socket_path = socket_path
+        self.options = options  # --backend et ses réglages, appliqués à tous les modèles servis
+        self.models: Dict[Tuple[str, str, str], Tuple[Callable[[str], str], threading.Lock]] = {}
+        self.loading: Dict[Tuple[str, str, str], threading.Lock] = {}  # un verrou de chargement par paire
+        self.lock = threading.Lock()  # court : tables models/loading et compteurs, jamais pendant un chargement
+        self.requests = 0
+        self.segments = 0
+
+    def model(self, src: str, tgt: str, sentencizer: str = ""):
+        if sentencizer and sentencizer not in SENTENCIZERS:
+            raise ValueError(f"découpage inconnu '{sentencizer}'")
+        key = (str(src).lower(), str(tgt).lower(), sentencizer)
+        with self.lock:
+            entry = self.models.get(key)
+            if entry is not None:
+                return entry
+            loading = self.loading.setdefault(key, threading.Lock())
+        # chargement d'une paire : les requêtes sur les paires déjà chargées ne l'attendent pas
+        with loading:
+            with self.lock:
+                entry = self.models.get(key)
+            if entry is None:
+                t0 = time.perf_counter()
+                opts = copy.copy(self.options) if self.options is not None else argparse.Namespace()
+                opts.source, opts.target, opts.sentencizer, opts.daemon_socket = src, tgt, sentencizer, ""
+                entry = (build_backend(opts), threading.Lock())
+                with self.lock:
+                    self.models[key] = entry
+                sys.stderr.write(f"[SERVE] modèle {_pair_label(key)} chargé en {time.perf_counter() - t0:.1f}s\n")
+        return entry
+
+    def handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        op = req.get("op")
+        if op == "ping":
+            with self.lock:
+                return {"ok": True, "pairs": [_pair_label(k) for k in self.models],
+                        "requests": self.requests, "segments": self.segments}
+        if op not in ("model", "translate"):
+            raise ValueError(f"opération inconnue '{op}'")
+        fn, lock = self.model(req.get("src", ""), req.get("tgt", ""), req.get("sentencizer") or "")
+        if op == "model":
+            return {"ok": True, "model_id": getattr(fn, "model_id", ""),
+                    "backend_info": getattr(fn, "backend_info", {})}
+        texts = req.get("texts") or []
+        with lock:
+            out = translate_many(fn, texts)
+        with self.lock:
+            self.requests += 1
+            self.segments += len(texts)
+        return {"ok": True, "texts": out}
+
+    def serve_forever(self):
+        path = self.socket_path
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.remove(path)  # socket orphelin d'un démon arrêté brutalement
+            else:
+                raise RuntimeError(f"Un démon écoute déjà sur '{path}'.")
+            finally:
+                probe.close()
+        server = _DaemonServer(path, _DaemonHandler)
+        server.translation_daemon = self
+        os.chmod(path, 0o600)
+        # SIGTERM -> SystemExit : même nettoyage que Ctrl+C
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        pairs = ", ".join(_pair_label(k) for k in self.models) or "à la demande"
+        sys.stderr.write(f"[SERVE] prêt sur {path} (modèles: {pairs})\n")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(path):
+                os.remove(path)
+            sys.stderr.write(f"[SERVE] arrêt ({self.requests} requêtes, {self.segments} segments)\n")
+
+def _pair_label(key: Tuple[str, str, str]) -> str:
+    src, tgt, sentencizer = key
+    return f"{src}->{tgt}" + (f" ({sentencizer})" if sentencizer else "")
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.translation_daemon
+        for line in self.rfile:
+            try:
+                resp = daemon.handle(_loads(line.decode("utf-8")))
+            except Exception as e:
+                resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write((_dumps_compact(resp) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+class DaemonClient:
+    """Connexion persistante au démon, rouverte après un fork (workers) ou une coupure."""
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.sock = None
+        self.rfile = None
+        self.pid = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise RuntimeError(f"Démon de traduction injoignable sur '{self.socket_path}' ({e}). "
+                               f"Lancez-le avec: --serve --daemon-socket {self.socket_path}") from e
+        self.sock, self.rfile, self.pid = sock, sock.makefile("rb"), os.getpid()
+
+    def call(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        if self.sock is None or self.pid != os.getpid():
+            self._connect()
+        try:
+            self.sock.sendall((_dumps_compact(req) + "\n").encode("utf-8"))
+            line = self.rfile.readline()
+        except OSError:
+            line = b""
+        if not line:
+            self.sock = None
+            raise RuntimeError(f"Le démon '{self.socket_path}' a fermé la connexion.")
+        resp = _loads(line.decode("utf-8"))
+        if not resp.get("ok"):
+            raise RuntimeError(f"Démon de traduction: {resp.get('error')}")
+        return resp
+
+def build_daemon_translator(socket_path: str, src_code: str, tgt_code: str,
+                            sentencizer: str = "") -> Callable[[str], str]:
+    """Même interface que build_translator ; même model_id, donc même mémoire de traduction."""
+    client = DaemonClient(socket_path)
+    pair = {"src": src_code, "tgt": tgt_code, "sentencizer": sentencizer}
+    resp = client.call(dict(pair, op="model"))
+    model_id = resp.get("model_id", "")
+
+    def _translate(text: str) -> str:
+        if not text:
+            return text
+        return client.call(dict(pair, op="translate", texts=[text]))["texts"][0]
+
+    def _translate_batch(texts: List[str]) -> List[str]:
+        return client.call(dict(pair, op="translate", texts=list(texts)))["texts"]
+
+    _translate.translate_batch = _translate_batch
+    _translate.model_id = model_id
+    _translate.backend_info = dict(resp.get("backend_info") or {}, daemon=socket_path)
+    return _translate
+
+def run_daemon(args):
+    daemon = TranslationDaemon(args.daemon_socket, args)
+    if args.target:
+        # préchargement des paires demandées (même syntaxe que --target, ex: en,es:via=en)
+        for code, src, _ in parse_target_specs(args.target, args.source):
+            daemon.model(src, code, args.sentencizer)
+    daemon.serve_forever()
+
+# ---------- Translation memory (cache persistant SQLite) ----------
+_TM_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+
+def _tm_normalize(text: str):
+    """Renvoie (espaces de tête, segment normalisé, espaces de fin)."""
+    core = text.strip()
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(leading) + len(core):]
+    core = unicodedata.normalize("NFC", _TM_SPACES_RE.sub(" ", core))
+    return leading, core, trailing
+
+def _glossary_fingerprint(glossary: Dict[str, str], mode: str) -> str:
+    if not glossary:
+        return "-"
+    blob = json.dumps([mode, sorted(glossary.items())], ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+class TranslationMemory:
+    """
+    Mémoire de traduction persistante (fichier SQLite) placée devant le traducteur.
+    Clé : (langue source, langue cible, modèle, empreinte glossaire, segment normalisé).
+    - statistiques hits/misses
+    - éviction LRU quand la table dépasse max_entries
+    - mode lecture seule (--tm-readonly) : aucune écriture, aucune éviction
+    """
+    COMMIT_EVERY = 200
+
+    def __init__(self, path: str, src: str, tgt: str, model_id: str, glossary_fp: str,
+                 readonly: bool = False, max_entries: int = 100000):
+        self.path = path
+        self.ctx = (src.lower(), tgt.lower(), model_id or "unknown", glossary_fp or "-")
+        self.readonly = readonly
+        self.max_entries = max(0, int(max_entries or 0))
+        self.hits = self.misses = self.writes = self.evicted = 0
+        self._pending = 0
+        self._touched: Dict[str, int] = {}
+        if readonly:
+            if not os.path.isfile(path):
+                raise RuntimeError(f"Mémoire de traduction introuvable (--tm-readonly): {path}")
+            self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            # timeout : plusieurs workers (--workers) peuvent écrire dans le même fichier
+            self.db = sqlite3.connect(path, timeout=60)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS tm ("
+                " src TEXT NOT NULL, tgt TEXT NOT NULL, model TEXT NOT NULL, glossary TEXT NOT NULL,"
+                " segment TEXT NOT NULL, translation TEXT NOT NULL, last_used INTEGER NOT NULL,"
+                " PRIMARY KEY (src, tgt, model, glossary, segment)) WITHOUT ROWID"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS tm_last_used ON tm(last_used)")
+            self.db.commit()
+        self._clock = int(time.time() * 1000)
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, segment: str):
+        row = self.db.execute(
+            "SELECT translation FROM tm WHERE src=? AND tgt=? AND model=? AND glossary=? AND segment=?",
+            self.ctx + (segment,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if not self.readonly:
+            self._touched[segment] = self._tick()
+        return row[0]
+
+    def put(self, segment: str, translation: str):
+        if self.readonly:
+            return
+        self.db.execute(
+            "INSERT OR REPLACE INTO tm (src, tgt, model, glossary, segment, translation, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self.ctx + (segment, translation, self._tick())
+        )
+        self.writes += 1
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self.db.commit()
+            self._pending = 0
+
+    def wrap(self, translate_fn: Callable[[str], str]) -> Callable[[str], str]:
+        def translate_with_tm(text: str) -> str:
+            if not text or not text.strip():
+                return text
+            leading, core, trailing = _tm_normalize(text)
+            cached = self.get(core)
+            if cached is None:
+                cached = translate_fn(core)
+                self.put(core, cached)
+            return leading + cached + trailing
+
+        def translate_batch_with_tm(texts: List[str]) -> List[str]:
+            parts = [_tm_normalize(t) if t and t.strip() else None for t in texts]
+            found: Dict[str, str] = {}
+            missing: List[str] = []
+            for part in parts:
+                if part is None or part[1] in found or part[1] in missing:
+                    continue
+                cached = self.get(part[1])
+                if cached is None:
+                    missing.append(part[1])
+                else:
+                    found[part[1]] = cached
+            if missing:
+                for seg, res in zip(missing, translate_many(translate_fn, missing)):
+                    self.put(seg, res)
+                    found[seg] = res
+            return [t if part is None else part[0] + found[part[1]] + part[2]
+                    for t, part in zip(texts, parts)]
+
+        translate_with_tm.translate_batch = translate_batch_with_tm
+        translate_with_tm.model_id = getattr(translate_fn, "model_id", "")
+        return translate_with_tm
+
+    def _flush_touched(self):
+        if self._touched:
+            self.db.executemany(
+                "UPDATE tm SET last_used=? WHERE src=? AND tgt=? AND model=? AND glossary=? AND segment=?",
+                [(ts,) + self.ctx + (seg,) for seg, ts in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        if not self.max_entries:
+            return
+        total = self.db.execute("SELECT COUNT(*) FROM tm").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM tm WHERE (src, tgt, model, glossary, segment) IN"
+                " (SELECT src, tgt, model, glossary, segment FROM tm ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self.evicted += excess
+
+    def checkpoint(self):
+        """Valide les écritures en cours et renvoie les compteurs depuis le dernier checkpoint."""
+        if not self.readonly:
+            self._flush_touched()
+            self.db.commit()
+            self._pending = 0
+        stats = (self.hits, self.misses, self.writes)
+        self.hits = self.misses = self.writes = 0
+        return stats
+
+    def absorb(self, stats):
+        """Ajoute les compteurs renvoyés par un worker (checkpoint)."""
+        if stats:
+            self.hits += stats[0]; self.misses += stats[1]; self.writes += stats[2]
+
+    def close(self):
+        if not self.readonly:
+            self._flush_touched()
+            self._evict()
+            self.db.commit()
+        self.db.close()
+
+    def summary(self, label: str = "") -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return (f"[TM{' ' + label if label else ''}] hits={self.hits} misses={self.misses} ({rate:.1f}% hit) "
+                f"écrits={self.writes} évincés={self.evicted}{' (lecture seule)' if self.readonly else ''}")
+
+# ---------- Traduction par lots (moteur deux passes) ----------
+def translate_many(translate_fn: Callable[[str], str], texts: List[str]) -> List[str]:
+    """Traduit une liste de segments : utilise translate_fn.translate_batch si le backend le permet."""
+    if not texts:
+        return []
+    batch = getattr(translate_fn, "translate_batch", None)
+    if batch is not None:
+        return list(batch(texts))
+    return [translate_fn(t) for t in texts]
+
+class SegmentDedup:
+    """
+    Table segment -> traduction partagée par tout le run (une par processus) : un segment répété
+    d'un produit à l'autre (titres, phrases types, valeurs meta) n'atteint le backend, ou la
+    mémoire de traduction, qu'une seule fois. Au-delà de max_entries, les plus anciens sortent
+    (FIFO) ; max_entries=0 désactive la table partagée.
+    Mesure aussi le temps passé dans le backend et, si track=True, les occurrences par segment
+    (--dedup-report).
+    """
+    def __init__(self, base_fn: Callable[[str], str], max_entries: int = 200000, track: bool = False):
+        self.base_fn = base_fn
+        self.max_entries = max(0, int(max_entries or 0))
+        self.track = track
+        self.done: Dict[str, str] = {}
+        self.occurrences: Dict[str, int] = {}
+        self.mt_segments = 0
+        self.mt_chars = 0
+        self.mt_seconds = 0.0
+        self.model_id = getattr(base_fn, "model_id", "")
+
+    def _seen(self, text: str):
+        if self.track:
+            self.occurrences[text] = self.occurrences.get(text, 0) + 1
+
+    def _translate(self, texts: List[str]) -> List[str]:
+        t0 = time.perf_counter()
+        out = translate_many(self.base_fn, texts)
+        self.mt_seconds += time.perf_counter() - t0
+        self.mt_segments += len(texts)
+        self.mt_chars += sum(len(t) for t in texts)
+        done = self.done
+        for seg, res in zip(texts, out):
+            done[seg] = res
+        if self.max_entries:
+            while len(done) > self.max_entries:
+                del done[next(iter(done))]
+        return out
+
+    def __call__(self, text: str) -> str:
+        if not text:
+            return text
+        self._seen(text)
+        hit = self.done.get(text)
+        if hit is not None:
+            return hit
+        return self._translate([text])[0]
+
+    def checkpoint(self):
+        """Renvoie (occurrences, segments traduits, caractères, secondes) depuis le dernier checkpoint."""
+        stats = (self.occurrences, self.mt_segments, self.mt_chars, self.mt_seconds)
+        self.occurrences = {}
+        self.mt_segments = self.mt_chars = 0
+        self.mt_seconds = 0.0
+        return stats
+
+class SegmentBatcher(SegmentDedup):
+    """
+    Moteur de traduction en deux passes placé sous le glossaire :
+      1) collecte : translate_product tourne une première fois, chaque segment qui atteindrait
+         le backend est enregistré (dédupliqué) et renvoyé tel quel ;
+      2) flush()  : la liste de travail part au backend par lots de batch_size ;
+      3) rendu    : translate_product est relancé, chaque segment est servi depuis la table.
+    Le wrapper glossaire étant déterministe, les segments protégés (__GLSn__) sont identiques
+    d'une passe à l'autre. La table est celle de SegmentDedup : conservée d'un lot à l'autre,
+    un segment déjà traduit n'est plus collecté.
+    """
+    def __init__(self, base_fn: Callable[[str], str], batch_size: int = 32, max_entries: int = 200000,
+                 track: bool = False):
+        super().__init__(base_fn, max_entries, track)
+        self.batch_size = max(1, int(batch_size))
+        self.collecting = False
+        self.pending: Dict[str, None] = {}
+        self.batches = 0
+
+    def __call__(self, text: str) -> str:
+        if not text:
+            return text
+        if self.collecting:
+            # occurrences comptées pendant la collecte uniquement (le rendu les revoit toutes)
+            self._seen(text)
+        hit = self.done.get(text)
+        if hit is not None:
+            return hit
+        if self.collecting:
+            self.pending.setdefault(text)
+            return text
+        # segment non vu pendant la collecte : traduction directe
+        self._seen(text)
+        return self._translate([text])[0]
+
+    def flush(self):
+        work = list(self.pending)
+        self.pending.clear()
+        for i in range(0, len(work), self.batch_size):
+            self._translate(work[i:i + self.batch_size])
+            self.batches += 1
+
+    def reset(self):
+        self.pending.clear()
+        if not self.max_entries:
+            self.done.clear()
+
+def translate_products_batched(products: List[Dict[str, Any]], translate_fn, batcher: SegmentBatcher,
+                               options, tiers=None) -> List[Dict[str, Any]]:
+    """
+    Traduit une liste de produits via le moteur deux passes (collecte, lots, rendu).
+    Profilage : latence d'un produit = ses deux passes + sa part du flush, au prorata des
+    caractères qu'il a ajoutés à la liste de travail.
+    """
+    if not products:
+        return []
+    prof = _PROF.enabled
+    costs: List[float] = []
+    shares: List[int] = []
+    batcher.collecting = True
+    _PROF.muted = True
+    try:
+        for prod in products:
+            t0, before = time.perf_counter(), len(batcher.pending)
+            translate_product(prod, translate_fn, options, tiers)
+            if prof:
+                costs.append(time.perf_counter() - t0)
+                shares.append(sum(len(seg) for seg in itertools.islice(batcher.pending, before, None)))
+    finally:
+        batcher.collecting = False
+        _PROF.muted = False
+    t0 = time.perf_counter()
+    batcher.flush()
+    flush_s = time.perf_counter() - t0
+    out = []
+    for i, prod in enumerate(products):
+        t0 = time.perf_counter()
+        out.append(translate_product(prod, translate_fn, options, tiers))
+        if prof:
+            costs[i] += time.perf_counter() - t0
+    batcher.reset()
+    if prof:
+        total = sum(shares)
+        _PROF.latencies.extend(
+            c + (flush_s * sh / total if total else flush_s / len(products)) for c, sh in zip(costs, shares)
+        )
+    return out
+
 # ---------- Emoji / HTML helpers ----------
-EMOJI_RE = re.compile(
-    "["                   
+# Plages emoji (classe de caractères partagée par EMOJI_RE et le tokenizer)
+_EMOJI_CLASS = (
     "\U0001F300-\U0001F5FF"
     "\U0001F600-\U0001F64F"
     "\U0001F680-\U0001F6FF"
@@ -80,74 +1144,35 @@ EMOJI_RE = re.compile(
     "\U00002700-\U000027BF"
     "\U00002600-\U000026FF"
     "\U00002B00-\U00002BFF"
-    "]+",
-    flags=re.UNICODE
 )
+EMOJI_RE = re.compile("[" + _EMOJI_CLASS + "]+", flags=re.UNICODE)
 
 TAG_RE = re.compile(r"(<[^>]+>)")
 NBSP_TOKEN = "\uF000NBSP\uF000"
 
-def split_html_preserve_tags(s: str) -> List[str]:
-    parts = []
-    last = 0
-    for m in TAG_RE.finditer(s):
-        if m.start() > last:
-            parts.append(s[last:m.start()])
-        parts.append(m.group(1))
-        last = m.end()
-    if last < len(s):
-        parts.append(s[last:])
-    return parts
+# Squelette : une découpe sur les balises (TAG_RE), puis, dans les nœuds texte qui en ont, sur
+# les suites d'emojis (avec les blancs / &nbsp; qui les suivent, jamais traduits).
+_EMOJI_RUN_RE = re.compile(r"((?:[" + _EMOJI_CLASS + r"](?:\s|&nbsp;)*)+)", flags=re.UNICODE)
+_EMOJI_SEARCH = EMOJI_RE.search
+_LEADING_HTML_SPACES_RE = re.compile(r"(?:\s|&nbsp;)+")
+_TAG_NAME_RE = re.compile(r"</?\s*([a-zA-Z0-9]+)")
 
 def tag_name(tag: str) -> str:
-    m = re.match(r"</?\s*([a-zA-Z0-9]+)", tag)
+    m = _TAG_NAME_RE.match(tag)
     return m.group(1).lower() if m else ""
 
 TRANSLATABLE_PARENTS = {
     "p","div","span","li","ul","ol","h1","h2","h3","h4","h5","h6","em","i","b","strong","small","sup","sub","blockquote","section","article","td","th","label","a"
 }
 
+_NO_TRANSLATE_TAGS = ("script", "style", "code", "pre")
+_NO_TRANSLATE_OPEN_RE = re.compile(r"<\s*(?:script|style|code|pre)(?![a-zA-Z0-9])", flags=re.IGNORECASE)
+
 def should_translate_text(open_stack: List[str]) -> bool:
-    if any(t in ("script","style","code","pre") for t in open_stack):
+    if any(t in _NO_TRANSLATE_TAGS for t in open_stack):
         return False
     return True
 
-def translate_preserving_emojis(text: str, translate_fn: Callable[[str], str], nbsp_token: str) -> str:
-    out = []
-    buf = []
-    i = 0
-    L = len(text)
-
-    def flush_buf():
-        if buf:
-            seg = "".join(buf).replace("&nbsp;", nbsp_token)
-            out.append(translate_fn(seg).replace(nbsp_token, "&nbsp;"))
-            buf.clear()
-
-    while i < L:
-        if text.startswith("&nbsp;", i):
-            buf.append("&nbsp;")
-            i += 6
-            continue
-        ch = text[i]
-        if EMOJI_RE.match(ch):
-            flush_buf()
-            out.append(ch)
-            i += 1
-            while i < L:
-                if text.startswith("&nbsp;", i):
-                    out.append("&nbsp;")
-                    i += 6
-                elif text[i].isspace():
-                    out.append(text[i]); i += 1
-                else:
-                    break
-            continue
-        buf.append(ch); i += 1
-
-    flush_buf()
-    return "".join(out)
-
 _WS_HTML_RE = re.compile(r'^((?:\s|&nbsp;)+)?(.*?)(?:((?:\s|&nbsp;)+))?$', re.DOTALL)
 def _split_leading_trailing_html_spaces(s: str):
     if not s:
@@ -157,6 +1182,318 @@ def _split_leading_trailing_html_spaces(s: str):
         return "", s, ""
     return (m.group(1) or ""), (m.group(2) or ""), (m.group(3) or "")
 
+# ---------- Normalisation HTML (--normalize-html) ----------
+# Réparations appliquées sur le flux balises/texte du squelette (remplace 'wp alprod fix-li-p' après import).
+HTML_REPAIR_RULES = ("unwrap_li_p", "close_dangling", "drop_stray_close", "collapse_empty_strong")
+_VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+                        "source", "track", "wbr"))
+_RAW_TEXT_TAGS = frozenset(("script", "style"))
+# Balise bien formée : '<nom' ou '</nom' suivi d'un blanc, '/' ou '>' (« a < b », « <b){} » restent du texte)
+_WELL_FORMED_TAG_RE = re.compile(r"<(/?)([A-Za-z][A-Za-z0-9:-]*)(?=[\s/>])")
+# Fermetures implicites (HTML) : ouvrant -> (frères refermés, bornes où la recherche s'arrête)
+_IMPLICIT_CLOSE = {
+    "li": (("li",), ("ul", "ol")),
+    "p": (("p",), ("li",)),
+    "td": (("td", "th"), ("tr", "table")),
+    "th": (("td", "th"), ("tr", "table")),
+    "tr": (("tr",), ("table", "thead", "tbody", "tfoot")),
+    "dt": (("dt", "dd"), ("dl",)),
+    "dd": (("dt", "dd"), ("dl",)),
+    "option": (("option",), ("select", "datalist", "optgroup")),
+}
+_EMPTY_HTML_TEXT = re.compile(r"(?:\s|&nbsp;)*\Z").match
+
+def normalize_html_parts(parts: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Répare une découpe TAG_RE.split (texte aux indices pairs, balises aux impairs) :
+      - unwrap_li_p           : <p>/</p> à l'intérieur d'un <li> retirés, contenu conservé ; un <br>
+                                sépare deux paragraphes (segments distincts, jamais recollés)
+      - close_dangling        : balises restées ouvertes refermées (fin du champ, parent fermé,
+                                fermetures implicites de _IMPLICIT_CLOSE : <li>, <p>, cellules...)
+      - drop_stray_close      : fermeture sans ouverture correspondante retirée
+      - collapse_empty_strong : <strong></strong> vide (blancs / &nbsp; seuls) retiré
+    Renvoie (nouvelle découpe, compteurs par règle). Seules les balises bien formées comptent, le
+    reste passe tel quel ; contenu de <script>/<style> intact, jamais refermé automatiquement.
+    """
+    out = [parts[0]]
+    counts: Dict[str, int] = {}
+    stack: List[List[Any]] = []  # [nom, index de la balise ouvrante dans out (None : retirée)]
+
+    def bump(rule: str):
+        counts[rule] = counts.get(rule, 0) + 1
+
+    def close(entry):
+        if entry[1] is not None and entry[0] not in _RAW_TEXT_TAGS:
+            out.append(f"</{entry[0]}>")
+            out.append("")
+            bump("close_dangling")
+
+    for i in range(1, len(parts), 2):
+        tag, text = parts[i], parts[i + 1]
+        if stack and stack[-1][0] in _RAW_TEXT_TAGS:
+            # contenu brut de <script>/<style> : « if(a<b){}</script> » peut former un seul jeton
+            end = re.search(r"</" + stack[-1][0] + r"(?=[\s>])", tag, re.IGNORECASE)
+            if end is None:
+                out[-1] += tag + text
+                continue
+            out[-1] += tag[:end.start()]
+            tag = tag[end.start():]
+        m = _WELL_FORMED_TAG_RE.match(tag)
+        name = m.group(2).lower() if m else ""
+        if not name:
+            out.append(tag)
+        elif m.group(1):
+            pos = next((j for j in range(len(stack) - 1, -1, -1) if stack[j][0] == name), None)
+            if pos is None:
+                bump("drop_stray_close")
+                out[-1] += text
+                continue
+            while len(stack) - 1 > pos:
+                close(stack.pop())
+            entry = stack.pop()
+            if entry[1] is None:
+                out[-1] += text  # fermeture d'un <p> retiré
+                continue
+            if name == "strong" and len(out) == entry[1] + 2 and _EMPTY_HTML_TEXT(out[-1]):
+                blank = out[-1]
+                del out[entry[1]:]
+                out[-1] += blank + text
+                bump("collapse_empty_strong")
+                continue
+            out.append(tag)
+        elif tag.endswith("/>") or name in _VOID_TAGS:
+            out.append(tag)
+        else:
+            implicit = _IMPLICIT_CLOSE.get(name)
+            if implicit is not None:
+                # frère encore ouvert (<li>, <td>...) : fermeture implicite rendue explicite
+                siblings, bounds = implicit
+                pos = next((j for j in range(len(stack) - 1, -1, -1)
+                            if stack[j][0] in siblings or stack[j][0] in bounds), None)
+                if pos is not None and stack[pos][0] in siblings:
+                    while len(stack) > pos:
+                        close(stack.pop())
+            li = next((j for j in range(len(stack) - 1, -1, -1) if stack[j][0] == "li"), None)
+            if name == "p" and li is not None:
+                stack.append([name, None])
+                bump("unwrap_li_p")
+                if any(not _EMPTY_HTML_TEXT(x) for x in out[stack[li][1] + 1::2]):
+                    out.append("<br>")  # paragraphe précédent dans le <li> : frontière gardée
+                    out.append(text)
+                else:
+                    out[-1] += text
+                continue
+            stack.append([name, len(out)])
+            out.append(tag)
+        out.append(text)
+    while stack:
+        close(stack.pop())
+    return out, counts
+
+_HTML_REPAIRS: Dict[str, int] = {}  # compteurs du processus, relevés à chaque lot (_take_html_repairs)
+
+def _take_html_repairs() -> Dict[str, int]:
+    counts = dict(_HTML_REPAIRS)
+    _HTML_REPAIRS.clear()
+    return counts
+
+class HtmlSkeleton:
+    """
+    Squelette d'un champ HTML/texte : littéraux fixes (balises, blancs, emojis, texte de
+    <script>/<style>/<code>/<pre>) et emplacements à traduire, alternés :
+        literals[0] + T(slots[0]) + literals[1] + ... + T(slots[n-1]) + literals[n]
+    Les emplacements sont les chaînes exactes envoyées au traducteur (&nbsp; protégé en
+    mode emoji 'keep'). Le rendu ne dépend que des traductions : changer un emplacement ne
+    demande ni nouveau découpage ni retraduction des autres.
+    """
+    __slots__ = ("literals", "slots", "nbsp", "repairs")
+
+    def __init__(self, literals: Tuple[str, ...], slots: Tuple[str, ...], nbsp: bool,
+                 repairs: Tuple[Tuple[str, int], ...] = ()):
+        self.literals = literals
+        self.slots = slots
+        self.nbsp = nbsp
+        self.repairs = repairs  # (règle, nombre) appliquées par --normalize-html
+
+    def translate(self, translate_fn: Callable[[str], str]) -> List[str]:
+        out = [translate_fn(slot) for slot in self.slots]
+        if self.nbsp:
+            out = [t.replace(NBSP_TOKEN, "&nbsp;") for t in out]
+        return out
+
+    def render(self, translations: List[str]) -> str:
+        lits = self.literals
+        if not translations:
+            return lits[0]
+        parts = [lits[0]]
+        for tr, lit in zip(translations, lits[1:]):
+            parts.append(tr)
+            parts.append(lit)
+        return "".join(parts)
+
+class _SkeletonBuilder:
+    def __init__(self, nbsp: bool):
+        self.nbsp = nbsp
+        self.literals: List[str] = []
+        self.slots: List[str] = []
+        self.lit: List[str] = []
+
+    def literal(self, text: str):
+        if text:
+            self.lit.append(text)
+
+    def slot(self, text: str):
+        self.literals.append("".join(self.lit))
+        self.lit = []
+        self.slots.append(text.replace("&nbsp;", NBSP_TOKEN) if self.nbsp else text)
+
+    def node(self, pieces: List[Tuple[bool, str]], strip: bool):
+        """
+        Nœud texte (entre deux balises) découpé en morceaux (emoji?, texte) :
+        en mode 'keep', chaque morceau de texte est un emplacement, les emojis des littéraux ;
+        strip=True retire d'abord les blancs/&nbsp; de tête et de queue du nœud.
+        """
+        if not self.nbsp:
+            text = "".join(t for _, t in pieces)
+            if strip:
+                leading, core, trailing = _split_leading_trailing_html_spaces(text)
+            else:
+                leading, core, trailing = "", text, ""
+            self.literal(leading)
+            if core:
+                self.slot(core)
+            self.literal(trailing)
+            return
+        last = len(pieces) - 1
+        for i, (is_emoji, text) in enumerate(pieces):
+            if is_emoji:
+                self.literal(text)
+                continue
+            leading = trailing = ""
+            if strip and i == 0 and i == last:
+                leading, text, trailing = _split_leading_trailing_html_spaces(text)
+            elif strip and i == 0:
+                m = _LEADING_HTML_SPACES_RE.match(text)
+                if m:
+                    leading, text = m.group(0), text[m.end():]
+            elif strip and i == last:
+                # un morceau qui suit un emoji ne commence jamais par un blanc (absorbé par l'emoji)
+                _, text, trailing = _split_leading_trailing_html_spaces(text)
+            self.literal(leading)
+            if text:
+                self.slot(text)
+            self.literal(trailing)
+
+    def build(self, repairs: Dict[str, int] = None) -> HtmlSkeleton:
+        self.literals.append("".join(self.lit))
+        return HtmlSkeleton(tuple(self.literals), tuple(self.slots), self.nbsp,
+                            tuple(sorted(repairs.items())) if repairs else ())
+
+@functools.lru_cache(maxsize=4096)
+def html_skeleton(s: str, emoji_mode: str = "keep", strip_strong: bool = False,
+                  normalize: bool = False) -> HtmlSkeleton:
+    """
+    Découpe un champ en squelette (mis en cache : les deux passes du moteur par lots et les
+    produits qui partagent un contenu ne le découpent qu'une fois). normalize=True répare
+    d'abord le flux de balises (normalize_html_parts).
+    """
+    if strip_strong and s:
+        s = _strip_strong_tags(s)
+    nbsp = emoji_mode == "keep"
+    b = _SkeletonBuilder(nbsp)
+    if not s:
+        b.literal(s)
+        return b.build()
+    html = "<" in s or ">" in s
+    if not html and not nbsp:
+        b.slot(s)
+        return b.build()
+
+    if not html:
+        b.node(_emoji_pieces(s), strip=False)
+        return b.build()
+
+    stack: List[str] = []
+
+    def on_tag(tag: str, name: str):
+        if tag.startswith("</"):
+            if stack and stack[-1] == name:
+                stack.pop()
+            elif name in stack:
+                while stack and stack[-1] != name:
+                    stack.pop()
+                if stack and stack[-1] == name:
+                    stack.pop()
+        elif not (tag.endswith("/>") or tag.startswith("<!")):
+            stack.append(name)
+        b.literal(tag)
+
+    # une seule découpe (en C) sur les balises : texte aux indices pairs, balises aux impairs ;
+    # sans <script>/<style>/<code>/<pre> ouvrant, la pile ne sert à rien : balises = littéraux
+    parts = TAG_RE.split(s)
+    repairs = None
+    if normalize:
+        parts, repairs = normalize_html_parts(parts)
+    track = _NO_TRANSLATE_OPEN_RE.search(s) is not None
+    emoji_search = _EMOJI_SEARCH if nbsp and _EMOJI_SEARCH(s) else None
+    lit = b.lit
+    for i, text in enumerate(parts):
+        if i & 1:
+            if track:
+                m = _TAG_NAME_RE.match(text)
+                on_tag(text, m.group(1).lower() if m else "")
+            else:
+                lit.append(text)
+            continue
+        if not text:
+            continue
+        if text[0] == "<":
+            # '<' sans balise complète en tête de nœud : traité comme une balise (comportement historique)
+            if track:
+                on_tag(text, tag_name(text))
+            else:
+                lit.append(text)
+        elif text.isspace() or (stack and not should_translate_text(stack)):
+            lit.append(text)
+        elif emoji_search is not None and emoji_search(text):
+            b.node(_emoji_pieces(text), strip=True)
+            lit = b.lit
+        else:
+            # cas courant inliné : un seul morceau, blancs/&nbsp; de bord en littéraux
+            if "&" in text:
+                leading, core, trailing = _WS_HTML_RE.match(text).groups()
+            else:
+                core = text.strip()
+                if len(core) == len(text):
+                    leading = trailing = None
+                else:
+                    n = len(text) - len(text.lstrip())
+                    leading, trailing = text[:n], text[n + len(core):]
+            if leading:
+                lit.append(leading)
+            if core:
+                b.slot(core)
+                lit = b.lit
+            if trailing:
+                lit.append(trailing)
+    return b.build(repairs)
+
+def _emoji_pieces(text: str) -> List[Tuple[bool, str]]:
+    """Morceaux (emoji?, texte) d'un texte sans balise : suites d'emojis (+ blancs qui suivent) / reste."""
+    return [(i % 2 == 1, part) for i, part in enumerate(_EMOJI_RUN_RE.split(text)) if part]
+
+@_profiled("emoji")
+def translate_preserving_emojis(text: str, translate_fn: Callable[[str], str], nbsp_token: str = NBSP_TOKEN) -> str:
+    """Texte brut : traduit les morceaux entre emojis, emojis et blancs qui les suivent conservés."""
+    if not text:
+        return text
+    b = _SkeletonBuilder(nbsp=True)
+    # texte brut : seules les suites d'emojis découpent (pas de balises ici)
+    b.node(_emoji_pieces(text), strip=False)
+    skel = b.build()
+    out = [translate_fn(slot.replace(NBSP_TOKEN, nbsp_token)).replace(nbsp_token, "&nbsp;") for slot in skel.slots]
+    return skel.render(out)
+
 STRONG_OPEN_RE  = re.compile(r"<\s*strong\b[^>]*>", flags=re.IGNORECASE)
 STRONG_CLOSE_RE = re.compile(r"<\s*/\s*strong\s*>", flags=re.IGNORECASE)
 def _strip_strong_tags(html: str) -> str:
@@ -166,53 +1503,16 @@ def _strip_strong_tags(html: str) -> str:
     html = STRONG_CLOSE_RE.sub("", html)
     return html
 
+@_profiled("html")
 def translate_html_string(s: str, translate_fn: Callable[[str], str],
-                          emoji_mode: str = "keep", strip_strong: bool = False) -> str:
-    if strip_strong and s:
-        s = _strip_strong_tags(s)
-    if not s or ("<" not in s and ">" not in s):
-        if not s:
-            return s
-        return translate_preserving_emojis(s, translate_fn, NBSP_TOKEN) if emoji_mode == "keep" else translate_fn(s)
-    segs = split_html_preserve_tags(s)
-    out, stack = [], []
-    for seg in segs:
-        if seg.startswith("<"):
-            name = tag_name(seg)
-            if seg.startswith("</"):
-                if stack and stack[-1] == name:
-                    stack.pop()
-                else:
-                    if name in stack:
-                        while stack and stack[-1] != name:
-                            stack.pop()
-                        if stack and stack[-1] == name:
-                            stack.pop()
-                out.append(seg)
-            else:
-                low = seg.lower()
-                if seg.endswith("/>") or low.startswith("<!--") or seg.startswith("<!"):
-                    out.append(seg)
-                else:
-                    stack.append(name)
-                    out.append(seg)
-        else:
-            if seg.strip() == "":
-                out.append(seg)
-            else:
-                if should_translate_text(stack):
-                    leading, core, trailing = _split_leading_trailing_html_spaces(seg)
-                    if core:
-                        translated_core = (
-                            translate_preserving_emojis(core, translate_fn, NBSP_TOKEN)
-                            if emoji_mode == "keep" else translate_fn(core)
-                        )
-                    else:
-                        translated_core = core
-                    out.append(leading + translated_core + trailing)
-                else:
-                    out.append(seg)
-    return "".join(out)
+                          emoji_mode: str = "keep", strip_strong: bool = False, normalize: bool = False) -> str:
+    if not s:
+        return s
+    skel = html_skeleton(s, emoji_mode, strip_strong, normalize)
+    if skel.repairs and not _PROF.muted:  # passe de collecte du moteur par lots : comptée au rendu
+        for rule, n in skel.repairs:
+            _HTML_REPAIRS[rule] = _HTML_REPAIRS.get(rule, 0) + n
+    return skel.render(skel.translate(translate_fn))
 
 # ---------- Slugify ----------
 def slugify(text: str) -> str:
@@ -273,25 +1573,106 @@ def _merge_glossary(g_file: Dict[str,str], g_pairs: List[str]) -> Dict[str,str]:
                 g[src] = tgt
     return g
 
+def _fold_char(ch: str) -> str:
+    low = ch.lower()
+    return low if len(low) == 1 else ch
+
+def _fold(text: str) -> str:
+    low = text.lower()
+    return low if len(low) == len(text) else "".join(_fold_char(ch) for ch in text)
+
+class CompiledGlossary:
+    """
+    Glossaire compilé une seule fois : trie des clés repliées en minuscules, émis sous forme
+    d'une regex factorisée par préfixes (une branche par caractère à chaque nœud).
+    Le moteur regex ne suit donc qu'un chemin par position, quel que soit le nombre d'entrées,
+    et les groupes optionnels gloutons donnent l'occurrence la plus longue d'abord (avec retour
+    arrière si la frontière de mot échoue), comme l'ancienne alternance triée par longueur.
+      - mode 'word'      : occurrence bornée par des caractères non-mot
+      - mode 'substring' : occurrence n'importe où
+    En cas de doublons à la casse près, la dernière entrée l'emporte.
+    """
+    _END = ""  # clé réservée du nœud terminal
+
+    def __init__(self, glossary: Dict[str, str], mode: str = "word"):
+        self.mode = "word" if mode == "word" else "substring"
+        self.lookup: Dict[str, str] = {}
+        root: Dict[str, Any] = {}
+        for src, dst in glossary.items():
+            src, dst = str(src), str(dst)
+            if not src or dst == "":
+                continue
+            key = _fold(src)
+            node = root
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[self._END] = True
+            self.lookup[key] = dst
+        self.pattern = None
+        if self.lookup:
+            body = self._node_regex(root)
+            if self.mode == "word":
+                body = r"(?<![\w])" + body + r"(?![\w])"
+            self.pattern = re.compile(body, re.IGNORECASE | re.UNICODE)
+
+    def __bool__(self) -> bool:
+        return self.pattern is not None
+
+    def __len__(self) -> int:
+        return len(self.lookup)
+
+    @classmethod
+    def _node_regex(cls, node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + cls._node_regex(child)
+                    for ch, child in node.items() if ch != cls._END]
+        if not branches:
+            return ""
+        alt = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if cls._END in node:
+            # fin de clé possible ici : suite facultative, tentée d'abord (gloutonne)
+            return (alt if len(branches) > 1 else "(?:" + alt + ")") + "?"
+        return alt
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Occurrences sans chevauchement : [(début, fin, cible)]."""
+        if not text or self.pattern is None:
+            return []
+        hits = []
+        for m in self.pattern.finditer(text):
+            dst = self.lookup.get(_fold(m.group(0)))
+            if dst is not None:
+                hits.append((m.start(), m.end(), dst))
+        return hits
+
+    def sub(self, text: str, repl) -> str:
+        """Remplace chaque occurrence par repl(texte_trouvé, cible)."""
+        if not text or self.pattern is None:
+            return text
+        lookup = self.lookup
+
+        def _repl(m: re.Match) -> str:
+            found = m.group(0)
+            dst = lookup.get(_fold(found))
+            return found if dst is None else repl(found, dst)
+
+        return self.pattern.sub(_repl, text)
+
+_COMPILED_GLOSSARIES: Dict[Tuple, CompiledGlossary] = {}
+
+def compile_glossary(glossary: Dict[str, str], mode: str = "word") -> CompiledGlossary:
+    """Compile (ou réutilise) le matcher d'un glossaire ; un seul trie par contenu et par mode."""
+    key = (mode, tuple((str(k), str(v)) for k, v in glossary.items()))
+    cg = _COMPILED_GLOSSARIES.get(key)
+    if cg is None:
+        cg = _COMPILED_GLOSSARIES[key] = CompiledGlossary(glossary, mode)
+    return cg
+
 def make_glossary_translate_fn(base_translate_fn, glossary: Dict[str, str], mode: str):
     if not glossary:
         return base_translate_fn
-    items_raw = [(str(k), str(v)) for k, v in glossary.items()]
-    items_raw = [(k, v) for (k, v) in items_raw if v != ""]
-    if not items_raw:
+    matcher = compile_glossary(glossary, mode)
+    if not matcher:
         return base_translate_fn
-    items = sorted(items_raw, key=lambda kv: len(kv[0]), reverse=True)
-    lut_lower = {k.lower(): v for k, v in items}
-    escaped = [re.escape(src) for src, _ in items if src]
-    if not escaped:
-        return base_translate_fn
-    if mode == "word":
-        pattern = re.compile(
-            r"(?<![\w])(" + "|".join(escaped) + r")(?![\w])",
-            flags=re.IGNORECASE | re.UNICODE
-        )
-    else:
-        pattern = re.compile("(" + "|".join(escaped) + ")", flags=re.IGNORECASE | re.UNICODE)
 
     def _make_token(i: int) -> str:
         return f"__GLS{i}__"
@@ -305,22 +1686,13 @@ def make_glossary_translate_fn(base_translate_fn, glossary: Dict[str, str], mode
 
     def translate_with_glossary(text: str) -> str:
         id2tgt: Dict[int, str] = {}
-        idx = 0
 
-        def _repl(m: re.Match) -> str:
-            nonlocal idx
-            src_found = m.group(0)
-            tgt_base = lut_lower.get(src_found.lower())
-            if tgt_base is None:
-                return src_found
-            case_mode = _detect_case(src_found)
-            tgt_final = _apply_case(tgt_base, case_mode)
-            token = _make_token(idx)
-            id2tgt[idx] = tgt_final
-            idx += 1
-            return token
-
-        protected = pattern.sub(_repl, text)
+        def _repl(src_found: str, tgt_base: str) -> str:
+            idx = len(id2tgt)
+            id2tgt[idx] = _apply_case(tgt_base, _detect_case(src_found))
+            return _make_token(idx)
+
+        protected = _PROF.call("glossary", matcher.sub, text, _repl)
         translated = base_translate_fn(protected)
 
         if id2tgt:
@@ -331,15 +1703,675 @@ def make_glossary_translate_fn(base_translate_fn, glossary: Dict[str, str], mode
                     return id2tgt.get(i, m.group(0))
                 except Exception:
                     return m.group(0)
-            translated = restore_pat.sub(_restore, translated)
+            translated = _PROF.call("glossary", restore_pat.sub, _restore, translated)
 
         return translated
 
     return translate_with_glossary
 
+# ---------- Masquage nombres / références (--mask-tokens) ----------
+# Unités et devises collées au nombre (même jeton) : symboles identiques d'une langue à l'autre
+# (pas Go/GB, tr/min... que le modèle doit traduire). Jamais dans une entité HTML (&#8211;).
+_MASK_UNITS = ("mAh", "kWh", "Wh", "kW", "W", "mV", "kV", "V", "mA", "A", "GHz", "MHz", "kHz", "Hz", "dB",
+               "mm²", "mm", "cm", "km", "m²", "m³", "m", "µm", "kg", "mg", "g", "ml", "mL", "cl", "cL", "l", "L",
+               "°C", "°F", "°", "%", "″", "Ω", "px", "€", "$", "£")
+_MASK_NUM_RE = re.compile(
+    r"(?<![\w.,#&])(?:[$€£][ \u00a0\u202f]?)?[+-]?\d+(?:[.,\u00a0\u202f]\d{3})*(?:[.,]\d+)?"
+    r"(?:[ \u00a0\u202f]?(?:" + "|".join(re.escape(u) for u in _MASK_UNITS) + r"))?(?![\w])"
+)
+# Référence / modèle : chiffres et majuscules mêlés (RX100, HD-1200X, USB3), tirets internes admis.
+_MASK_REF_RE = re.compile(r"(?<![\w#&-])(?=[A-Za-z0-9-]*\d)(?=[A-Za-z0-9-]*[A-Z])[A-Za-z0-9]+(?:-[A-Za-z0-9]+)*(?![\w-])")
+_MASK_RESTORE_RE = re.compile(r"_{1,2}\s*(NUM|REF)\s*(\d+)\s*_{1,2}", re.IGNORECASE)
+_HAS_DIGIT = re.compile(r"\d").search
+
+def compile_mask_patterns(patterns: List[str]) -> List[re.Pattern]:
+    out = []
+    for pat in patterns or ():
+        try:
+            out.append(re.compile(pat))
+        except re.error as e:
+            raise RuntimeError(f"--mask-pattern invalide '{pat}': {e}")
+    return out
+
+class SegmentMasker:
+    """
+    Remplace les jetons variables d'un segment (références --mask-pattern, codes modèle, nombres
+    avec unité ou devise) par des marqueurs __REFn__ / __NUMn__ avant traduction, puis les restaure.
+    « Sèche-cheveux 1200 W » et « Sèche-cheveux 1800 W » deviennent un seul segment pour la table
+    de dédup et la mémoire de traduction. Marqueur perdu ou dupliqué par le modèle : le segment est
+    retraduit sans masque.
+    """
+    def __init__(self, patterns: List[str] = ()):
+        self.custom = [("REF", rx) for rx in compile_mask_patterns(patterns)]
+        self.builtin = [("REF", _MASK_REF_RE), ("NUM", _MASK_NUM_RE)]
+        self.segments = self.tokens = self.fallbacks = 0
+        # le moteur deux passes et les segments répétés masquent plusieurs fois le même texte
+        self.mask = functools.lru_cache(maxsize=1 << 14)(self._mask)
+
+    def _mask(self, text: str) -> Tuple[str, Dict[str, str]]:
+        spans: Dict[str, str] = {}
+        counts = {"REF": 0, "NUM": 0}
+        # les motifs intégrés exigent un chiffre : la plupart des segments s'arrêtent là
+        for kind, rx in (self.custom + self.builtin if _HAS_DIGIT(text) else self.custom):
+            if rx.search(text) is None:
+                continue
+
+            def _repl(m: re.Match, kind=kind) -> str:
+                tok = f"__{kind}{counts[kind]}__"
+                counts[kind] += 1
+                spans[tok] = m.group(0)
+                return tok
+            text = rx.sub(_repl, text)
+        return text, spans
+
+    @staticmethod
+    def restore(translated: str, spans: Dict[str, str]):
+        """Texte restauré, ou None si un marqueur manque ou revient plusieurs fois."""
+        seen: List[str] = []
+
+        def _restore(m: re.Match) -> str:
+            tok = f"__{m.group(1).upper()}{int(m.group(2))}__"
+            if tok not in spans:
+                return m.group(0)
+            seen.append(tok)
+            return spans[tok]
+        out = _MASK_RESTORE_RE.sub(_restore, translated)
+        return out if len(seen) == len(spans) == len(set(seen)) else None
+
+    def wrap(self, translate_fn: Callable[[str], str]) -> Callable[[str], str]:
+        def translate_masked(text: str) -> str:
+            if not text:
+                return text
+            masked, spans = _PROF.call("mask", self.mask, text)
+            if not spans:
+                return translate_fn(text)
+            out = _PROF.call("mask", self.restore, translate_fn(masked), spans)
+            # compteurs hors passe de collecte du moteur par lots (le rendu revoit chaque segment)
+            counting = not getattr(translate_fn, "collecting", False)
+            if out is None:
+                self.fallbacks += counting
+                return translate_fn(text)
+            if counting:
+                self.segments += 1
+                self.tokens += len(spans)
+            return out
+
+        translate_masked.model_id = getattr(translate_fn, "model_id", "")
+        return translate_masked
+
+    def checkpoint(self):
+        """Renvoie (segments masqués, marqueurs, retraductions sans masque) depuis le dernier checkpoint."""
+        stats = (self.segments, self.tokens, self.fallbacks)
+        self.segments = self.tokens = self.fallbacks = 0
+        return stats
+
+# ---------- Pré-filtre « rien à traduire » (--prefilter) ----------
+# Raisons, dans l'ordre d'évaluation : aucune lettre hors marqueurs (__GLSn__ seul, ponctuation,
+# emoji ZWJ...), URL / e-mail, codes (SKU, références : chaque mot contient un chiffre), marques
+# (--brand-file), texte déjà dans la langue cible (détection hors-ligne par mots-outils).
+PREFILTER_REASONS = ("no_letters", "url", "code", "brand", "target_lang")
+_PF_MARKER_RE = re.compile(r"_{1,2}\s*(?:GLS|NUM|REF)\s*\d+\s*_{1,2}", re.IGNORECASE)
+_PF_URL_RE = re.compile(r"(?:https?://|www\.)\S+|[\w.+-]+@[\w-]+(?:\.[\w-]+)+", re.IGNORECASE)
+_PF_CODE_RE = re.compile(r"(?=\S*\d)[A-Za-z0-9][A-Za-z0-9./_+-]*")
+_PF_STRIP = ".,;:!?()[]{}«»\"'’‘“”|/*•·–—-"
+_PF_WORD_RE = re.compile(r"[^\W\d_]+(?:[’'][^\W\d_]+)?")
+
+# Mots-outils propres à chaque langue (les mots communs à deux langues ne comptent pour aucune)
+_LANG_STOPWORDS = {
+    "fr": "le la les des du de un une et est pour avec dans sur au aux ce cette ces son sa ses vos votre nos notre "
+          "qui que pas plus très sans par ou il elle ils sont idéal grâce tout tous vous nous leur en se",
+    "en": "the and of to for with in on is are this that your our from by an be it its as at or not more very "
+          "without can will has have you which into ideal",
+    "es": "el la los las del de un una y es para con en por su sus que más muy sin este esta estos estas al se lo "
+          "como o ideal gracias todo usted nuestro nuestra",
+}
+_LANG_WORDS = {lang: set(words.split()) for lang, words in _LANG_STOPWORDS.items()}
+_LANG_UNIQUE = {lang: ws - set().union(*(o for l, o in _LANG_WORDS.items() if l != lang))
+                for lang, ws in _LANG_WORDS.items()}
+# Lettres qui excluent la langue (accents absents de l'anglais, ñ/¿ en français, lettres françaises en espagnol)
+_LANG_EXCLUDE = {"en": re.compile(r"[À-ÖØ-öø-ɏ¿¡]"), "fr": re.compile(r"[ñÑ¿¡]"),
+                 "es": re.compile(r"[àâçèêëîïôœùûÿÀÂÇÈÊËÎÏÔŒÙÛŸ]")}
+
+def looks_like_language(text: str, lang: str) -> bool:
+    """
+    Identification de langue légère (fr/en/es) : au moins 3 mots, 2 mots-outils propres à `lang`
+    et au moins 3 fois plus que ceux des autres langues, aucune lettre exclue. Volontairement
+    prudente : un segment non reconnu part au modèle, un segment mal reconnu resterait non traduit.
+    """
+    unique = _LANG_UNIQUE.get(lang)
+    if unique is None or _LANG_EXCLUDE[lang].search(text):
+        return False
+    words = [w.lower() for w in _PF_WORD_RE.findall(text)]
+    if len(words) < 3:
+        return False
+    hits = {l: sum(w in ws for w in words) for l, ws in _LANG_UNIQUE.items()}
+    own = hits.pop(lang)
+    return own >= 2 and own >= 3 * sum(hits.values())
+
+def parse_prefilter_reasons(spec: str) -> frozenset:
+    spec = (spec or "").strip().lower()
+    if spec in ("", "none"):
+        return frozenset()
+    if spec == "all":
+        return frozenset(PREFILTER_REASONS)
+    reasons = frozenset(r.strip() for r in spec.split(",") if r.strip())
+    unknown = sorted(reasons - set(PREFILTER_REASONS))
+    if unknown:
+        raise RuntimeError(f"--prefilter : raison inconnue {', '.join(unknown)} (attendu: all, none ou {', '.join(PREFILTER_REASONS)}).")
+    return reasons
+
+def parse_prefilter_fields(specs: List[str]) -> List[Tuple[str, bool, frozenset]]:
+    """'champ=raisons' (champ : name, content_long, meta:<clé>... ; suffixe * = préfixe) -> règles."""
+    rules = []
+    for spec in specs or ():
+        field, sep, reasons = spec.partition("=")
+        field = field.strip()
+        if not sep or not field:
+            raise RuntimeError(f"--prefilter-field invalide '{spec}' (attendu: champ=raisons, ex: content_long=no_letters,url).")
+        prefix = field.endswith("*")
+        rules.append((field.rstrip("*"), prefix, parse_prefilter_reasons(reasons)))
+    return rules
+
+def load_brand_list(path: str) -> List[str]:
+    """Marques : JSON (liste, ou objet dont les clés sont les marques) ou une marque par ligne (# = commentaire)."""
+    brands: List[str] = []
+    if not path:
+        return brands
+    try:
+        with io.open(path, "r", encoding="utf-8") as f:
+            if path.lower().endswith(".json"):
+                data = json.load(f)
+                brands = [str(b) for b in (data if isinstance(data, list) else data.keys() if isinstance(data, dict) else ())]
+            else:
+                brands = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    except Exception as e:
+        sys.stderr.write(f"[WARN] Impossible de lire la liste de marques '{path}': {e}\n")
+    return [b.strip() for b in brands if b and b.strip()]
+
+class SegmentPrefilter:
+    """
+    Pré-filtre placé sous le glossaire (il voit les segments protégés __GLSn__) : un segment sans
+    rien à traduire (raisons PREFILTER_REASONS) est rendu tel quel, sans atteindre le masquage, la
+    table de dédup, la mémoire de traduction ni le modèle. Raisons actives par défaut (--prefilter)
+    et par champ (--prefilter-field) : le champ en cours est posé dans self.field par translate_product
+    (pile exposée via translate_fn.prefilter). Compte les segments évités par raison.
+    """
+    def __init__(self, default: str, field_specs: List[str], brands: List[str], target: str):
+        self.default = parse_prefilter_reasons(default)
+        self.rules = parse_prefilter_fields(field_specs)
+        self.target = (target or "").lower()
+        names = sorted({_fold(b) for b in brands}, key=len, reverse=True)
+        self.brand_re = (re.compile(r"(?<!\w)(?:" + "|".join(re.escape(n) for n in names) + r")(?!\w)")
+                         if names else None)
+        self.field = ""  # champ produit en cours de traduction
+        self.counts: Dict[str, int] = {}
+        self._by_field: Dict[str, frozenset] = {}
+        self.classify = functools.lru_cache(maxsize=1 << 14)(self._classify)
+
+    def reasons_for(self, field: str) -> frozenset:
+        reasons = self._by_field.get(field)
+        if reasons is None:
+            reasons = self.default
+            for name, prefix, rule in self.rules:  # la dernière règle qui correspond l'emporte
+                if field == name or (prefix and field.startswith(name)):
+                    reasons = rule
+            self._by_field[field] = reasons
+        return reasons
+
+    @staticmethod
+    def _all_codes(text: str) -> str:
+        """'url' / 'code' si chaque mot est une URL ou un code, sinon ''."""
+        kind = "code"
+        words = [w.strip(_PF_STRIP) for w in text.split()]
+        for w in words:
+            if not w:
+                continue
+            if _PF_URL_RE.fullmatch(w):
+                kind = "url"
+            elif not _PF_CODE_RE.fullmatch(w):
+                return ""
+        return kind if any(words) else ""
+
+    def _classify(self, text: str, reasons: frozenset):
+        rest = _PF_MARKER_RE.sub(" ", text)
+        if not any(ch.isalpha() for ch in rest):
+            return "no_letters" if "no_letters" in reasons else None
+        kind = self._all_codes(rest)
+        if kind and kind in reasons:
+            return kind
+        if "brand" in reasons and self.brand_re is not None:
+            left = self.brand_re.sub(" ", _fold(rest))
+            if left != _fold(rest) and (not any(ch.isalpha() for ch in left) or self._all_codes(left)):
+                return "brand"
+        if "target_lang" in reasons and looks_like_language(rest, self.target):
+            return "target_lang"
+        return None
+
+    def wrap(self, translate_fn: Callable[[str], str], batcher=None) -> Callable[[str], str]:
+        def translate_prefiltered(text: str) -> str:
+            if not text:
+                return text
+            reasons = self.reasons_for(self.field)
+            why = _PROF.call("prefilter", self.classify, text, reasons) if reasons else None
+            if why is None:
+                return translate_fn(text)
+            # compteurs hors passe de collecte du moteur par lots (le rendu revoit chaque segment)
+            if not getattr(batcher, "collecting", False):
+                self.counts[why] = self.counts.get(why, 0) + 1
+            return text
+
+        translate_prefiltered.model_id = getattr(translate_fn, "model_id", "")
+        return translate_prefiltered
+
+    def signature(self) -> Dict[str, Any]:
+        return {"default": sorted(self.default), "fields": [[n, p, sorted(r)] for n, p, r in self.rules],
+                "brands": self.brand_re.pattern if self.brand_re is not None else ""}
+
+    def checkpoint(self) -> Dict[str, int]:
+        """Renvoie les segments évités par raison depuis le dernier checkpoint."""
+        stats, self.counts = self.counts, {}
+        return stats
+
+# ---------- Schéma produit ----------
+# Champs émis par export-al-products.php et types acceptés ; les autres clés passent telles quelles.
+# Un champ objet accepte aussi [] (json_encode d'un tableau PHP vide).
+_OPT_STR = (str, type(None))
+PRODUCT_SCHEMA: Dict[str, Tuple[type, ...]] = {
+    "id":                 (int, str, type(None)),
+    "source_id":          (int, str, type(None)),
+    "slug":               _OPT_STR,
+    "status":             _OPT_STR,
+    "lang":               _OPT_STR,
+    "date":               _OPT_STR,
+    "modified":           _OPT_STR,
+    "title":              _OPT_STR,
+    "name":               _OPT_STR,
+    "content_long":       _OPT_STR,
+    "content_short":      _OPT_STR,
+    "permalink":          _OPT_STR,
+    "source_hash":        _OPT_STR,
+    "meta":               (dict, type(None)),
+    "tax":                (dict, type(None)),
+    "al_product-cat_ids": (dict, type(None)),
+    "image":              (dict, type(None)),
+    "images":             (list, type(None)),
+    "translations":       (dict, type(None)),
+}
+PRODUCT_HTML_FIELDS = ("content_short", "content_long")
+
+_JSON_TYPE_NAMES = {type(None): "null", bool: "booléen", int: "nombre", float: "nombre",
+                    str: "chaîne", list: "tableau", dict: "objet"}
+
+def _json_type(v: Any) -> str:
+    return _JSON_TYPE_NAMES.get(type(v), type(v).__name__)
+
+def check_product(prod: Any, where: str) -> Dict[str, Any]:
+    """Valide un produit décodé contre PRODUCT_SCHEMA ; RuntimeError explicite dès la lecture."""
+    if not isinstance(prod, dict):
+        raise RuntimeError(f"{where}: objet JSON attendu, {_json_type(prod)} trouvé.")
+    for key, value in prod.items():
+        expected = PRODUCT_SCHEMA.get(key)
+        if expected is None or isinstance(value, expected):
+            continue
+        if dict in expected and isinstance(value, list) and not value:
+            continue
+        attendu = "/".join(_JSON_TYPE_NAMES[t] for t in expected)
+        raise RuntimeError(f"{where} (id={prod.get('id')!r}): champ '{key}' de type {_json_type(value)}, attendu {attendu}.")
+    return prod
+
+# ---------- Lecture / écriture en flux ----------
+JSONL_EXTS = (".jsonl", ".ndjson")
+OUTPUT_FORMATS = ("pretty", "compact")
+
+# Backend JSON rapide facultatif (pip install orjson) : encodage ~10x plus rapide, mêmes octets
+# que la bibliothèque standard ; repli sur json pour ce qu'orjson refuse (entiers > 64 bits...).
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+JSON_BACKEND = "orjson" if _orjson is not None else "json"
+
+def _loads(text: str) -> Any:
+    if _orjson is not None:
+        try:
+            return _orjson.loads(text)
+        except ValueError:
+            pass  # NaN, surrogates isolés... : la bibliothèque standard tranche
+    return json.loads(text)
+
+def _dumps_compact(obj: Any) -> str:
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def _dumps_pretty(obj: Any) -> str:
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def _is_jsonl(path: str) -> bool:
+    return str(path or "").lower().endswith(JSONL_EXTS)
+
+def iter_products(path: str, read_size: int = 1 << 16, validate: bool = True):
+    """
+    Itère sur les produits sans charger tout le fichier :
+      - .jsonl / .ndjson : un objet JSON par ligne
+      - sinon : tableau JSON lu incrémentalement (raw_decode sur un tampon glissant, déjà en C)
+    Chaque produit est validé (check_product) : une ligne malformée échoue à la lecture.
+    """
+    with io.open(path, "r", encoding="utf-8") as f:
+        if _is_jsonl(path):
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = _loads(line)
+                except ValueError as e:
+                    raise RuntimeError(f"{path}:{lineno}: ligne JSON invalide ({e})") from e
+                yield check_product(obj, f"{path}:{lineno}") if validate else obj
+            return
+
+        decoder = json.JSONDecoder()
+        buf, pos, eof = "", 0, False
+
+        def fill(min_size: int = 0):
+            nonlocal buf, pos, eof
+            chunk = f.read(max(read_size, min_size))
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        skip_ws()
+        if pos < len(buf) and buf[pos] == "\ufeff":
+            pos += 1
+            skip_ws()
+        if pos >= len(buf) or buf[pos] != "[":
+            raise RuntimeError("Le JSON d'entrée doit être une liste d'objets (produits).")
+        pos += 1
+        first = True
+        index = 0
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                raise RuntimeError(f"{path}: fin de fichier inattendue (tableau JSON non fermé).")
+            if buf[pos] == "]":
+                return
+            if not first:
+                if buf[pos] != ",":
+                    raise RuntimeError(f"{path}: ',' attendue entre deux produits.")
+                pos += 1
+                skip_ws()
+            first = False
+            index += 1
+            grow = read_size
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                    # un nombre coupé en fin de tampon pourrait être décodé partiellement :
+                    # on exige un délimiteur derrière tout ce qui n'est pas objet/tableau/chaîne
+                    if not eof and not isinstance(obj, (dict, list, str)) and (
+                            end >= len(buf) or buf[end] not in " \t\r\n,]"):
+                        raise ValueError("tampon incomplet")
+                    break
+                except ValueError:
+                    if eof:
+                        raise RuntimeError(f"{path}: produit JSON n°{index} invalide ou tronqué.")
+                    fill(grow)
+                    grow *= 2
+            pos = end
+            yield check_product(obj, f"{path}: produit n°{index}") if validate else obj
+
+class ProductWriter:
+    """
+    Écrit les produits au fil de l'eau dans '<sortie>.part', renommé atomiquement en fin de run
+    (un fichier partiel existe si le run s'interrompt, la sortie précédente reste intacte).
+    Format tableau 'pretty' : octet pour octet identique à json.dump(liste, ensure_ascii=False, indent=2).
+    Format tableau 'compact' : un produit compact par ligne entre '[' et ']'.
+    Format .jsonl : un produit compact par ligne.
+    """
+    def __init__(self, path: str, output_format: str = ""):
+        self.path = path
+        self.part_path = path + ".part"
+        self.jsonl = _is_jsonl(path)
+        self.pretty = not self.jsonl and output_format != "compact"
+        self.f = io.open(self.part_path, "w", encoding="utf-8")
+        self.count = 0
+
+    @_profiled("json_dump")
+    def write(self, prod: Dict[str, Any]):
+        if self.jsonl:
+            self.f.write(_dumps_compact(prod) + "\n")
+        elif self.pretty:
+            body = _dumps_pretty(prod).replace("\n", "\n  ")
+            self.f.write(("[\n  " if self.count == 0 else ",\n  ") + body)
+        else:
+            self.f.write(("[\n" if self.count == 0 else ",\n") + _dumps_compact(prod))
+        self.count += 1
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self, commit: bool = True):
+        if self.f.closed:
+            return
+        if not self.jsonl:
+            self.f.write("\n]" if self.count else "[]")
+        self.f.flush()
+        if commit:
+            os.fsync(self.f.fileno())
+        self.f.close()
+        if commit:
+            os.replace(self.part_path, self.path)
+
+# ---------- Journal de reprise (checkpoint) ----------
+class CheckpointJournal:
+    """
+    Journal append-only '<sortie>.journal.jsonl' : une ligne par produit traduit
+    {"id": ..., "hash": empreinte source, "product": {...}}, fsync à chaque lot.
+    Avec --resume, les produits déjà journalisés (même id, même empreinte) ne sont pas retraduits.
+    La première ligne porte l'empreinte des options : un journal d'un autre réglage est ignoré.
+    Le journal est supprimé quand la sortie finale a été écrite.
+    """
+    def __init__(self, path: str, options_fp: str, resume: bool = False):
+        self.path = path
+        self.options_fp = options_fp
+        self.done: Dict[str, Any] = {}
+        self.resumed = 0
+        if resume and os.path.isfile(path) and self._load():
+            self.f = io.open(path, "a", encoding="utf-8")
+        else:
+            if resume:
+                sys.stderr.write(f"[RESUME] Aucun journal exploitable '{path}': run complet.\n")
+            self.f = io.open(path, "w", encoding="utf-8")
+            self.f.write(json.dumps({"journal": 1, "options": options_fp}) + "\n")
+            self.sync()
+
+    def _load(self) -> bool:
+        with io.open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if header.get("options") != self.options_fp:
+            sys.stderr.write(f"[RESUME] Journal '{self.path}' produit avec d'autres options: ignoré.\n")
+            return False
+        records = []
+        for line in lines[1:]:
+            try:
+                rec = _loads(line)
+            except ValueError:
+                break  # dernière ligne tronquée par l'interruption
+            records.append(rec)
+            self.done[self.key(rec.get("id"))] = (rec.get("hash"), rec.get("product"))
+        # réécrit le journal sans l'éventuelle ligne tronquée avant d'y ajouter des entrées
+        with io.open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(lines[0] if lines[0].endswith("\n") else lines[0] + "\n")
+            for rec in records:
+                f.write(_dumps_compact(rec) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".tmp", self.path)
+        return True
+
+    @staticmethod
+    def key(prod_id) -> str:
+        return json.dumps(prod_id)
+
+    def take(self, prod_id, fp: str):
+        """Renvoie le produit traduit journalisé pour cet id si l'empreinte source correspond."""
+        hit = self.done.pop(self.key(prod_id), None)
+        if hit is not None and hit[0] == fp:
+            self.resumed += 1
+            return hit[1]
+        return None
+
+    def record(self, prod_id, fp: str, translated: Dict[str, Any]):
+        self.f.write(_dumps_compact({"id": prod_id, "hash": fp, "product": translated}) + "\n")
+
+    def sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self, remove: bool = False):
+        if not self.f.closed:
+            self.f.close()
+        if remove and os.path.isfile(self.path):
+            os.remove(self.path)
+
+# ---------- Manifeste des changements (--changeset) ----------
+def payload_hash(prod: Dict[str, Any]) -> str:
+    """Empreinte stable d'un produit traduit (tout ce que l'importeur écrit ; hors source_hash)."""
+    blob = json.dumps({k: v for k, v in prod.items() if k != "source_hash"},
+                      ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+def _file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with io.open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class ChangesetManifest:
+    """
+    Manifeste '<sortie>.changes.json' lu par l'importeur WP-CLI (alprod import --changeset=...) :
+    par produit écrit, sa clé (id, sinon source_id, sinon #position), son source_id, l'empreinte
+    du contenu traduit et son état face à la sortie précédente : new / changed / unchanged.
+    Porte le sha1 de la sortie : un manifeste qui ne correspond plus au fichier est ignoré.
+    Écrit (atomiquement) seulement si le run est allé au bout.
+    """
+    def __init__(self, path: str, output: str, previous: str):
+        self.path = path
+        self.output = output
+        self.previous = previous if previous and os.path.isfile(previous) else ""
+        self.prev_hashes: Dict[str, str] = {}
+        if self.previous:
+            for pos, item in enumerate(iter_products(self.previous, validate=False)):
+                if isinstance(item, dict):
+                    self.prev_hashes[str(_product_key(item, pos))] = payload_hash(item)
+        self.entries: List[Dict[str, Any]] = []
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+
+    def record(self, prod: Dict[str, Any]):
+        key = str(_product_key(prod, len(self.entries)))
+        h = payload_hash(prod)
+        prev = self.prev_hashes.get(key)
+        status = "new" if prev is None else ("unchanged" if prev == h else "changed")
+        self.counts[status] += 1
+        self.entries.append({"key": key, "source_id": prod.get("source_id"), "hash": h, "status": status})
+
+    def write(self):
+        doc = {
+            "version": 1,
+            "output": os.path.basename(self.output),
+            "output_sha1": _file_sha1(self.output),
+            "previous": os.path.basename(self.previous) if self.previous else None,
+            "counts": self.counts,
+            "products": self.entries,
+        }
+        tmp = self.path + ".part"
+        with io.open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(doc, ensure_ascii=False, indent=1))
+        os.replace(tmp, self.path)
+
+    def summary(self, label: str) -> str:
+        c = self.counts
+        return (f"[CHANGESET {label}] nouveaux={c['new']} modifiés={c['changed']} inchangés={c['unchanged']}"
+                f" -> {self.path}")
+
+# ---------- Table des attributs (--attr-map) ----------
+class AttributeMap:
+    """
+    Table '<sortie>.attrs.json' lue par l'importeur WP-CLI (alprod import --attr-map=...) : par clé
+    META d'attribut, chaque valeur source distincte du run et sa traduction. L'importeur crée ou
+    retrouve les termes une fois par valeur distincte, avant la boucle produits, au lieu de refaire
+    les recherches de termes produit par produit. Écrite (atomiquement) seulement si le run est allé au bout.
+    """
+    def __init__(self, path: str, source: str, target: str):
+        self.path = path
+        self.source = source
+        self.target = target
+        self.values: Dict[str, Dict[str, str]] = {}
+        self.conflicts = 0  # même valeur source, traductions différentes (la première est gardée)
+
+    def record(self, src: Dict[str, Any], out: Dict[str, Any]):
+        src_meta, out_meta = src.get("meta"), out.get("meta")
+        if not isinstance(src_meta, dict) or not isinstance(out_meta, dict):
+            return
+        for k, v in src_meta.items():
+            if not isinstance(v, str) or not v.strip() or not _is_attribute_meta_key(k):
+                continue
+            tr = out_meta.get(k)
+            if not isinstance(tr, str):
+                continue
+            known = self.values.setdefault(k, {}).setdefault(v, tr)
+            if known != tr:
+                self.conflicts += 1
+
+    def write(self):
+        doc = {
+            "version": 1,
+            "source": self.source,
+            "target": self.target,
+            "counts": {k: len(vals) for k, vals in sorted(self.values.items())},
+            "attributes": {k: dict(sorted(vals.items())) for k, vals in sorted(self.values.items())},
+        }
+        tmp = self.path + ".part"
+        with io.open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(doc, ensure_ascii=False, indent=1))
+        os.replace(tmp, self.path)
+
+    def summary(self, label: str) -> str:
+        n = sum(len(vals) for vals in self.values.values())
+        return (f"[ATTRS {label}] valeurs distinctes={n} clés={len(self.values)} conflits={self.conflicts}"
+                f" -> {self.path}")
+
 # ---------- Progress bar ----------
-def _print_progress(i: int, n: int, width: int = 30):
-    if n <= 0: return
+def _print_progress(i: int, n: int = 0, width: int = 30):
+    if n <= 0:
+        # total inconnu (lecture en flux) : simple compteur
+        sys.stderr.write(f"\r[{i} produits]")
+        sys.stderr.flush()
+        return
     i = min(i, n)
     ratio = i / n
     filled = int(ratio * width)
@@ -398,6 +2430,153 @@ def _is_attribute_meta_key(key: str) -> bool:
     if not isinstance(key, str): return False
     return key.startswith(ATTRIBUTE_META_PREFIXES)
 
+# ---------- Politique des clés META ----------
+META_ACTIONS = ("translate", "translate-html", "copy", "drop")
+
+# Politique par défaut : internes WordPress/Divi/Yoast/importeur jamais envoyés au modèle.
+# Les clés sans règle suivent le traitement historique (MARQUE/TENSION, TYPE, puis "default").
+DEFAULT_META_POLICY = {
+    "default": "translate",
+    "exact": {
+        "_yoast_wpseo_metadesc": "translate-html",
+        "_yoast_wpseo_title": "translate",
+        "_yoast_wpseo_focuskw": "translate",
+        "_yoast_wpseo_keywordsynonyms": "translate",
+        "_edit_lock": "copy",
+        "_edit_last": "copy",
+        "_wp_page_template": "copy",
+        "_wp_old_slug": "copy",
+        "_wp_old_date": "copy",
+        "_thumbnail_id": "copy",
+        "_price": "copy",
+        "_sku": "copy",
+        "_sort": "copy",
+        "_alprod_touch": "copy",
+        "_alprod_restore_touch": "copy",
+        "_yoast_wpseo_linkdex": "copy",
+        "_yoast_wpseo_content_score": "copy",
+        "_yoast_wpseo_estimated-reading-time-minutes": "copy",
+    },
+    "prefix": {
+        "_et_pb_": "copy",
+        "_et_builder_": "copy",
+        "_yoast_wpseo_primary_": "copy",
+        "_attribute-unit": "copy",
+        "_shipping-label": "copy",
+    },
+    "regex": {
+        r"^_oembed_(?:time_)?[0-9a-f]{32}$": "copy",
+    },
+}
+
+class MetaPolicy:
+    """
+    Politique déclarative par clé META : translate / translate-html / copy / drop.
+    Règles par clé exacte, préfixe (le plus long gagne) ou regex (ordre du fichier), dans cet ordre
+    de priorité ; la résolution d'une clé est mémorisée (une seule évaluation par clé et par run).
+    """
+    def __init__(self, spec: Dict[str, Any]):
+        self.default = spec.get("default") or "translate"
+        self.exact: Dict[str, Tuple[str, str]] = {}
+        self.prefixes: List[Tuple[str, str, str]] = []
+        self.regexes: List[Tuple[Any, str, str]] = []
+        for kind in ("exact", "prefix", "regex"):
+            for pattern, action in (spec.get(kind) or {}).items():
+                if action not in META_ACTIONS:
+                    raise RuntimeError(f"Politique META : action inconnue '{action}' pour {kind} '{pattern}' "
+                                       f"(attendu: {', '.join(META_ACTIONS)}).")
+                name = f"{kind}:{pattern}"
+                if kind == "exact":
+                    self.exact[pattern] = (name, action)
+                elif kind == "prefix":
+                    self.prefixes.append((pattern, name, action))
+                else:
+                    try:
+                        regex = re.compile(pattern)
+                    except re.error as e:
+                        raise RuntimeError(f"Politique META : regex invalide '{pattern}' ({e}).") from e
+                    self.regexes.append((regex, name, action))
+        if self.default not in ("translate", "copy", "drop"):
+            raise RuntimeError(f"Politique META : action par défaut invalide '{self.default}'.")
+        self.prefixes.sort(key=lambda r: len(r[0]), reverse=True)
+        self._spec = spec
+        self._cache: Dict[str, Any] = {}
+
+    def resolve(self, key: str):
+        """Renvoie (nom de règle, action) ou None si aucune règle ne couvre la clé."""
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        rule = self.exact.get(key)
+        if rule is None:
+            for prefix, name, action in self.prefixes:
+                if key.startswith(prefix):
+                    rule = (name, action)
+                    break
+        if rule is None:
+            for rx, name, action in self.regexes:
+                if rx.search(key):
+                    rule = (name, action)
+                    break
+        self._cache[key] = rule
+        return rule
+
+    def signature(self) -> str:
+        return json.dumps(self._spec, ensure_ascii=False, sort_keys=True)
+
+    def saved_calls(self, products: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Par règle copy/drop : nombre de valeurs qui seraient parties au modèle sans elle."""
+        saved: Dict[str, int] = {}
+        for prod in products:
+            for k, v in (prod.get("meta") or {}).items():
+                rule = self.resolve(k)
+                if rule is not None and rule[1] in ("copy", "drop") and _is_mt_candidate(v):
+                    saved[rule[0]] = saved.get(rule[0], 0) + 1
+        return saved
+
+    def __getstate__(self):
+        # le cache de résolution reste propre à chaque processus
+        return {"spec": self._spec}
+
+    def __setstate__(self, state):
+        self.__init__(state["spec"])
+
+def _is_mt_candidate(v: Any) -> bool:
+    return isinstance(v, str) and v.strip() != "" and not _looks_numeric_with_unit(v)
+
+def load_meta_policy(path: str = "") -> MetaPolicy:
+    """
+    Politique par défaut, surchargée par un fichier JSON facultatif :
+    { "default": "translate", "exact": {"_price": "copy"}, "prefix": {"_et_pb_": "copy"},
+      "regex": {"^_oembed_": "drop"}, "replace_defaults": false }
+    Les règles du fichier remplacent celles de même motif ; "replace_defaults": true part de zéro.
+    """
+    spec = {k: (dict(v) if isinstance(v, dict) else v) for k, v in DEFAULT_META_POLICY.items()}
+    if path:
+        with io.open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            raise RuntimeError(f"Politique META '{path}' : objet JSON attendu.")
+        if raw.get("replace_defaults"):
+            spec = {"default": "translate", "exact": {}, "prefix": {}, "regex": {}}
+        for kind in ("exact", "prefix", "regex"):
+            if isinstance(raw.get(kind), dict):
+                spec[kind].update({str(k): str(v) for k, v in raw[kind].items()})
+        if raw.get("default"):
+            spec["default"] = str(raw["default"])
+    return MetaPolicy(spec)
+
+_DEFAULT_POLICY: List[MetaPolicy] = []
+
+def _meta_policy(options) -> MetaPolicy:
+    policy = getattr(options, "meta_policy", None)
+    if policy is None:
+        if not _DEFAULT_POLICY:
+            _DEFAULT_POLICY.append(load_meta_policy())
+        policy = _DEFAULT_POLICY[0]
+    return policy
+
 # Table par défaut (vide). On la surchargera par fichier JSON externe s’il existe.
 TYPE_GLOSSARY = {}  # dict keyed by (src_lang, tgt_lang) -> { "fr_val": "en_val", ... }
 
@@ -426,87 +2605,144 @@ def _load_type_glossary_override():
     except Exception:
         return {}
 
+# Index compilés du glossaire TYPE, un par paire (src, tgt) ; à vider si TYPE_GLOSSARY change
+_TYPE_GLOSSARY_INDEX: Dict[Tuple[str, str], Tuple[Dict[str, str], CompiledGlossary]] = {}
+
+def _type_glossary_index(key: Tuple[str, str]):
+    idx = _TYPE_GLOSSARY_INDEX.get(key)
+    if idx is None:
+        table = TYPE_GLOSSARY.get(key, {}) or {}
+        exact: Dict[str, str] = {}
+        for src, dst in table.items():
+            exact.setdefault(str(src).lower(), dst)  # première entrée gagnante, comme avant
+        idx = _TYPE_GLOSSARY_INDEX[key] = (exact, compile_glossary(table, "substring"))
+    return idx
+
+@_profiled("type_glossary")
 def apply_type_glossary(value: str, src_lang: str, tgt_lang: str, translate_fn):
     """
     1) Essaie le glossaire TYPE (match exact insensible à la casse,
-       puis remplacements contextuels).
+       puis remplacements contextuels en une passe, occurrence la plus longue d'abord).
     2) Si rien trouvé, fallback vers translate_fn(value).
     """
     if not value:
         return value
 
     key = (str(src_lang or "").lower(), str(tgt_lang or "").lower())
-    table = TYPE_GLOSSARY.get(key, {}) or {}
+    exact, matcher = _type_glossary_index(key)
     v = value
 
     # a) Match exact (ignorer casse)
-    for src, dst in table.items():
-        if v.lower() == str(src).lower():
-            return dst
-
-    # b) Remplacements contextuels (mots/expressions)
-    changed = False
-    for src, dst in table.items():
-        src = str(src)
-        dst = str(dst)
-        # mot entier
-        pattern = r"\b" + re.escape(src) + r"\b"
-        if re.search(pattern, v, flags=re.IGNORECASE):
-            v2 = re.sub(pattern, dst, v, flags=re.IGNORECASE)
-            if v2 != v:
-                v = v2
-                changed = True
-        else:
-            # sinon occurrence générale
-            v2 = re.sub(re.escape(src), dst, v, flags=re.IGNORECASE)
-            if v2 != v:
-                v = v2
-                changed = True
+    dst = exact.get(v.lower())
+    if dst is not None:
+        return dst
 
-    if changed:
-        return v
+    # b) Remplacements contextuels (mots/expressions, y compris collés : pluriels…)
+    v2 = matcher.sub(v, lambda found, dst: str(dst))
+    if v2 != v:
+        return v2
 
     # c) Fallback MT si aucune règle n'a matché
     return translate_fn(v)
 
 
 # ---------- Translation of one product ----------
-def translate_product(prod: Dict[str, Any], translate_fn, options) -> Dict[str, Any]:
-    out = json.loads(json.dumps(prod))  # deep copy
+@_profiled("copy")
+def _copy_product(prod: Dict[str, Any], options=None) -> Dict[str, Any]:
+    """
+    Copie sur écriture : seuls les conteneurs que translate_product réécrit sont dupliqués
+    (le produit, meta, tax et, avec --translate-attr-labels, les termes d'attributs).
+    images, translations, catégories, vieux contenus Divi... restent partagés avec l'entrée :
+    ils ne sont jamais modifiés, ni ici ni à l'écriture.
+    """
+    out = dict(prod)
+    for key in ("meta", "tax"):
+        sub = out.get(key)
+        if isinstance(sub, dict):
+            out[key] = dict(sub)
+    tax = out.get("tax")
+    if getattr(options, "translate_attr_labels", False) and isinstance(tax, dict):
+        for tax_name, terms in list(tax.items()):
+            if isinstance(tax_name, str) and "attributes" in tax_name and isinstance(terms, list):
+                tax[tax_name] = [dict(t) if isinstance(t, dict) else t for t in terms]
+    return out
+
+# Priorité des champs pour l'ordonnanceur à budget (--deadline / --max-chars) : le rang 0 passe
+# d'abord sur tout le catalogue (nom, extrait, SEO, TYPE), content_long en dernier. Clés : nom du
+# champ ou "meta:<clé>" (mêmes noms que le profilage) ; "tax" = labels d'attributs.
+FIELD_TIERS = {"name": 0, "content_short": 0, "meta:_yoast_wpseo_title": 0, "meta:_yoast_wpseo_metadesc": 0,
+               "content_long": 2}
+TIER_COUNT = 3
+
+def field_tier(field: str) -> int:
+    tier = FIELD_TIERS.get(field)
+    if tier is None:
+        tier = 0 if field.startswith("meta:") and _is_type_key(field[5:]) else 1
+    return tier
+
+def translate_product(prod: Dict[str, Any], translate_fn, options, tiers=None, deferred: List[str] = None) -> Dict[str, Any]:
+    """
+    tiers : rangs de priorité à traduire (None = tous) ; les autres champs restent tels quels et,
+    si deferred est une liste, leurs noms y sont ajoutés (ordonnanceur à budget).
+    """
+    out = _copy_product(prod, options)
     emoji_mode   = getattr(options, "emoji_mode", "keep")
     strip_strong = bool(getattr(options, "strip_strong", False))
+    normalize    = bool(getattr(options, "normalize_html", False))
+    prefilter    = getattr(translate_fn, "prefilter", None)
+
+    def begin(field: str, text: Any):
+        """Champ en cours : mesure (--report) et réglages par champ du pré-filtre."""
+        _PROF.field(field, text)
+        if prefilter is not None:
+            prefilter.field = field
+
+    def skip(field: str) -> bool:
+        if field_tier(field) in tiers:
+            return False
+        if deferred is not None:
+            deferred.append(field)
+        return True
 
-    # Text/HTML fields
-    if "content_short" in out and out["content_short"] is not None:
-        out["content_short"] = translate_html_string(out["content_short"], translate_fn, emoji_mode, strip_strong)
-    if "content_long" in out and out["content_long"] is not None:
-        out["content_long"]  = translate_html_string(out["content_long"],  translate_fn, emoji_mode, strip_strong)
+    # Text/HTML fields (types garantis par check_product à la lecture)
+    for field in PRODUCT_HTML_FIELDS:
+        text = out.get(field)
+        if text is not None and (tiers is None or not skip(field)):
+            begin(field, text)
+            out[field] = translate_html_string(text, translate_fn, emoji_mode, strip_strong, normalize)
 
     # Name (usually plain text)
-    if "name" in out and out["name"] is not None:
-        out["name"] = translate_fn(out["name"])
+    name = out.get("name")
+    if name is not None and (tiers is None or not skip("name")):
+        begin("name", name)
+        out["name"] = name = translate_fn(name)
 
-    # Slug from translated name
-    if getattr(options, "slug_from_name", False):
-        if "name" in out and out["name"]:
-            out["slug"] = slugify(out["name"])
+        # Slug from translated name
+        if getattr(options, "slug_from_name", False) and name:
+            out["slug"] = slugify(name)
 
-    # Yoast / metas (exemples courants)
+    # Metas : politique déclarative d'abord (Yoast, internes WordPress/Divi...), puis attributs
     meta = out.get("meta") or {}
-    if "_yoast_wpseo_metadesc" in meta and meta["_yoast_wpseo_metadesc"] is not None:
-        meta["_yoast_wpseo_metadesc"] = translate_html_string(meta["_yoast_wpseo_metadesc"], translate_fn, emoji_mode, strip_strong)
-    if "_yoast_wpseo_title" in meta and meta["_yoast_wpseo_title"] is not None:
-        meta["_yoast_wpseo_title"] = translate_fn(meta["_yoast_wpseo_title"])
-    if "_yoast_wpseo_focuskw" in meta and meta["_yoast_wpseo_focuskw"] is not None:
-        meta["_yoast_wpseo_focuskw"] = translate_fn(meta["_yoast_wpseo_focuskw"])
-    if "_yoast_wpseo_keywordsynonyms" in meta and meta["_yoast_wpseo_keywordsynonyms"] is not None:
-        meta["_yoast_wpseo_keywordsynonyms"] = translate_fn(meta["_yoast_wpseo_keywordsynonyms"])
-
-    # ✅ Traduction des attributs en meta
+    policy = _meta_policy(options)
     src = options.source  # "fr" -> première passe
     tgt = options.target  # "en" puis plus tard "es" sur le JSON en entrée
 
     for k, v in list(meta.items()):
+        rule = policy.resolve(k)
+        if rule is not None:
+            action = rule[1]
+            if action == "drop":
+                del meta[k]
+            elif action == "translate-html":
+                if isinstance(v, str) and v and (tiers is None or not skip("meta:" + k)):
+                    begin("meta:" + k, v)
+                    meta[k] = translate_html_string(v, translate_fn, emoji_mode, strip_strong, normalize)
+            elif action == "translate":
+                if isinstance(v, str) and not _looks_numeric_with_unit(v) and (tiers is None or not skip("meta:" + k)):
+                    begin("meta:" + k, v)
+                    meta[k] = translate_fn(v)
+            continue
+
         # 1) MARQUE/TENSION : COPIE telle quelle (pas de traduction)
         if _is_attr_key_copy_raw(k):
             meta[k] = v if v is not None else ""
@@ -514,16 +2750,20 @@ def translate_product(prod: Dict[str, Any], translate_fn, options) -> Dict[str,
 
         # 2) TYPE : glossaire externe + fallback Argos
         if _is_type_key(k) and isinstance(v, str):
-            if not _looks_numeric_with_unit(v):
-                meta[k] = apply_type_glossary(v, src, tgt, translate_fn)
-            else:
+            if _looks_numeric_with_unit(v):
                 meta[k] = v
+            elif tiers is None or not skip("meta:" + k):
+                begin("meta:" + k, v)
+                meta[k] = apply_type_glossary(v, src, tgt, translate_fn)
             continue
 
-        # 3) Autres clés META : ton comportement existant (si tu traduis d'autres metas)
+        # 3) Autres clés META : action par défaut de la politique
         #    Évite de traduire si valeur strictement numérique/unité
-        if isinstance(v, str) and not _looks_numeric_with_unit(v):
-            # si tu as déjà une logique HTML-safe, conserve-la ici
+        if policy.default == "drop":
+            del meta[k]
+        elif (policy.default == "translate" and isinstance(v, str) and not _looks_numeric_with_unit(v)
+              and (tiers is None or not skip("meta:" + k))):
+            begin("meta:" + k, v)
             meta[k] = translate_fn(v)
 
     out["meta"] = meta
@@ -537,12 +2777,13 @@ def translate_product(prod: Dict[str, Any], translate_fn, options) -> Dict[str,
 
     # ✅ Traduction des noms côté taxonomie des attributs (ex: al_product-attributes)
     # Désactivé par défaut. On ne veut pas toucher aux labels (Polylang gère les étiquettes).
-    if getattr(options, "translate_attr_labels", False):
+    if getattr(options, "translate_attr_labels", False) and (tiers is None or not skip("tax")):
         for tax_name, terms in list(tax.items()):
             try:
                 if isinstance(tax_name, str) and "attributes" in tax_name and isinstance(terms, list):
                     for t in terms:
                         if isinstance(t, dict) and "name" in t and isinstance(t["name"], str) and t["name"]:
+                            begin("tax", t["name"])
                             t["name"] = translate_fn(t["name"])
             except Exception:
                 pass
@@ -559,41 +2800,861 @@ def translate_product(prod: Dict[str, Any], translate_fn, options) -> Dict[str,
 
     return out
 
+# ---------- Mode incrémental ----------
+# Options qui changent le contenu produit par translate_product : toute variation force la retraduction.
+FINGERPRINT_OPTIONS = ("source", "target", "target_name", "emoji_mode", "strip_strong",
+                       "slug_from_name", "set_source_id", "null_id", "translate_attr_labels")
+
+def _options_fingerprint(options, glossary_fp: str, model_id: str) -> str:
+    key = (str(getattr(options, "source", "")).lower(), str(getattr(options, "target", "")).lower())
+    sig = {
+        "options": {k: getattr(options, k, None) for k in FINGERPRINT_OPTIONS},
+        "glossary": glossary_fp,
+        "type_glossary": sorted((TYPE_GLOSSARY.get(key) or {}).items()),
+        "meta_policy": _meta_policy(options).signature(),
+        "model": model_id or "",
+    }
+    if getattr(options, "mask_tokens", False):
+        sig["mask"] = list(options.mask_pattern or ())
+    if getattr(options, "normalize_html", False):
+        sig["normalize_html"] = list(HTML_REPAIR_RULES)
+    if getattr(options, "prefilter", "") or getattr(options, "prefilter_field", None):
+        sig["prefilter"] = SegmentPrefilter(options.prefilter, options.prefilter_field, options.brands,
+                                            options.target).signature()
+    blob = json.dumps(sig, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+def product_fingerprint(prod: Dict[str, Any], options_fp: str) -> str:
+    """
+    Empreinte d'un produit source pour le mode incrémental.
+    translate_product recopie tous les champs (images, translations, modified...) dans la sortie :
+    l'empreinte couvre donc l'objet complet, plus la signature des options/glossaires/modèle.
+    """
+    blob = json.dumps(prod, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1((options_fp + "\n" + blob).encode("utf-8")).hexdigest()
+
+def _product_key(prod: Dict[str, Any], pos: int):
+    """Clé stable d'un produit source : id, sinon source_id (entrée déjà traduite, --null-id), sinon position."""
+    for k in ("id", "source_id"):
+        v = prod.get(k)
+        if v not in (None, ""):
+            return v
+    return f"#{pos}"
+
+def _load_previous_output(path: str):
+    """Indexe la sortie précédente par empreinte (source_hash) et par source_id."""
+    by_hash, by_source = {}, {}
+    if not path or not os.path.isfile(path):
+        if path:
+            sys.stderr.write(f"[WARN] Sortie précédente introuvable '{path}': tout sera retraduit.\n")
+        return by_hash, by_source
+    for item in iter_products(path, validate=False):
+        if not isinstance(item, dict):
+            continue
+        h = item.get("source_hash")
+        if h:
+            by_hash[h] = item
+        sid = item.get("source_id")
+        if sid not in (None, ""):
+            by_source[sid] = item
+    return by_hash, by_source
+
+# ---------- Pile de traduction & multi-process ----------
+def build_translation_stack(args, glossary: Dict[str, str], base_fn: Callable[[str], str] = None,
+                            tm_evict: bool = True):
+    """
+    Construit la pile : backend -> mémoire de traduction -> moteur par lots / table de dédup
+    -> masquage (--mask-tokens) -> pré-filtre (--prefilter) -> glossaire.
+    Renvoie (translate_fn, batcher, tm, masker, prefilter) ; batcher est un SegmentBatcher (deux
+    passes), un SegmentDedup (table seule, --batch-size 0) ou None ; masker un SegmentMasker ou
+    None ; prefilter un SegmentPrefilter ou None.
+    """
+    translate_fn = base_fn or build_backend(args)
+    model_id = getattr(translate_fn, "model_id", "")
+    if _PROF.enabled:
+        translate_fn = _profiled_backend(translate_fn)
+
+    # Mémoire de traduction (sous le glossaire : elle voit les segments protégés __GLSn__)
+    tm = None
+    if args.tm_file:
+        tm = TranslationMemory(args.tm_file, args.source, args.target, model_id,
+                               _glossary_fingerprint(glossary, args.glossary_mode),
+                               readonly=args.tm_readonly,
+                               max_entries=args.tm_max_entries if tm_evict else 0)
+        translate_fn = tm.wrap(translate_fn)
+
+    # Moteur par lots + table de dédup du run (entre le glossaire et la mémoire de traduction)
+    batcher = None
+    track = args.dedup_report > 0
+    if args.batch_size > 0:
+        batcher = SegmentBatcher(translate_fn, args.batch_size, args.dedup_max_entries, track)
+    elif args.dedup_max_entries > 0:
+        batcher = SegmentDedup(translate_fn, args.dedup_max_entries, track)
+    if batcher is not None:
+        translate_fn = batcher
+
+    # Masquage sous le glossaire : ses marqueurs __GLSn__ ne sont jamais pris pour des nombres
+    masker = None
+    if getattr(args, "mask_tokens", False):
+        masker = SegmentMasker(args.mask_pattern)
+        translate_fn = masker.wrap(translate_fn)
+
+    # Pré-filtre sous le glossaire : un segment réduit à ses marqueurs __GLSn__ n'a rien à traduire
+    prefilter = None
+    if getattr(args, "prefilter", "") or getattr(args, "prefilter_field", None):
+        prefilter = SegmentPrefilter(args.prefilter, args.prefilter_field, args.brands, args.target)
+        translate_fn = prefilter.wrap(translate_fn, batcher)
+
+    translate_fn = make_glossary_translate_fn(translate_fn, glossary, args.glossary_mode)
+    if prefilter is not None:
+        translate_fn.prefilter = prefilter  # translate_product y pose le champ en cours
+    return translate_fn, batcher, tm, masker, prefilter
+
+def translate_chunk(products: List[Dict[str, Any]], translate_fn, batcher, options, tiers=None) -> List[Dict[str, Any]]:
+    if isinstance(batcher, SegmentBatcher):
+        return translate_products_batched(products, translate_fn, batcher, options, tiers)
+    if not _PROF.enabled:
+        return [translate_product(prod, translate_fn, options, tiers) for prod in products]
+    out = []
+    for prod in products:
+        t0 = time.perf_counter()
+        out.append(translate_product(prod, translate_fn, options, tiers))
+        _PROF.latencies.append(time.perf_counter() - t0)
+    return out
+
+_WORKER: Dict[str, Any] = {}  # état propre à chaque processus worker (ou au processus principal en séquentiel)
+
+def _init_worker(hop_options: List[Any], glossaries: List[Dict[str, str]], type_glossary, base_fns=None):
+    """
+    Initialiseur du pool : construit une pile de traduction par étape (src->tgt), une seule fois
+    par worker. L'éviction LRU de la mémoire de traduction est faite par le processus principal.
+    """
+    TYPE_GLOSSARY.clear()
+    TYPE_GLOSSARY.update(type_glossary)
+    _TYPE_GLOSSARY_INDEX.clear()
+    _PROF.enabled = any(getattr(o, "report", "") for o in hop_options)
+    stacks = []
+    for i, (opts, glossary) in enumerate(zip(hop_options, glossaries)):
+        base_fn = base_fns[i] if base_fns else None
+        translate_fn, batcher, tm, masker, prefilter = build_translation_stack(opts, glossary, base_fn, tm_evict=False)
+        stacks.append((translate_fn, batcher, tm, masker, prefilter, opts))
+    _WORKER["stacks"] = stacks
+
+def _worker_translate_chunk(hop_index: int, products: List[Dict[str, Any]], tiers=None):
+    translate_fn, batcher, tm, masker, prefilter, opts = _WORKER["stacks"][hop_index]
+    res = translate_chunk(products, translate_fn, batcher, opts, tiers)
+    stats = {
+        "tm": tm.checkpoint() if tm is not None else None,
+        # règles META comptées une fois par produit (au premier rang avec l'ordonnanceur à budget)
+        "meta": _meta_policy(opts).saved_calls(products) if tiers is None or 0 in tiers else {},
+        "dedup": batcher.checkpoint() if batcher is not None else None,
+        "mask": masker.checkpoint() if masker is not None else None,
+        "prefilter": prefilter.checkpoint() if prefilter is not None else None,
+        "html": _take_html_repairs(),
+        "prof": _PROF.checkpoint() if _PROF.enabled else None,
+    }
+    return res, stats
+
+def _close_worker():
+    for _, _, tm, _, _, _ in _WORKER.pop("stacks", []):
+        if tm is not None:
+            tm.close()
+
+class _InlineExecutor:
+    """Exécuteur synchrone (mode --workers 1) : même interface que ProcessPoolExecutor.submit."""
+    def submit(self, fn, *a, **kw):
+        from concurrent.futures import Future
+        fut = Future()
+        try:
+            fut.set_result(fn(*a, **kw))
+        except BaseException as e:
+            fut.set_exception(e)
+        return fut
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+# ---------- Multi-cibles (--target en,es:via=en) ----------
+def parse_target_specs(target: str, source: str):
+    """
+    '--target en,es:via=en' (source fr) -> [("en", "fr", None), ("es", "en", 0)]
+    Renvoie une liste (cible, langue source de l'étape, index de l'étape parente ou None).
+    """
+    specs, index = [], {}
+    for raw in [t.strip() for t in str(target or "").split(",") if t.strip()]:
+        code, _, rest = raw.partition(":")
+        code = code.strip()
+        via = None
+        for opt in [o.strip() for o in rest.split(":") if o.strip()]:
+            k, _, v = opt.partition("=")
+            if k.strip().lower() != "via" or not v.strip():
+                raise RuntimeError(f"Option de cible inconnue '{opt}' (attendu: via=<langue>).")
+            via = v.strip()
+        if not code or code in index:
+            raise RuntimeError(f"Cible invalide ou dupliquée: '{raw}'.")
+        if via is not None and via not in index:
+            raise RuntimeError(f"Pivot '{via}' pour '{code}' : doit être une cible déclarée avant (ex: en,es:via=en).")
+        specs.append((code, via if via is not None else source, index.get(via) if via is not None else None))
+        index[code] = len(specs) - 1
+    if not specs:
+        raise RuntimeError("--target vide.")
+    return specs
+
+def _per_target(path: str, lang: str) -> str:
+    return path.replace("{lang}", lang) if path else path
+
+class Hop:
+    """
+    Une étape de traduction src->tgt écrivant une sortie. Une étape pivot (via=) prend en entrée
+    les produits traduits par l'étape parente, gardés en mémoire (pas de réécriture/relecture JSON).
+    Porte le mode incrémental, le journal de reprise et l'écrivain en flux de sa sortie.
+    """
+    def __init__(self, index: int, options, glossary: Dict[str, str], parent, model_id: str,
+                 backend_info: Dict[str, Any] = None):
+        self.index = index
+        self.options = options
+        self.glossary = glossary
+        self.parent = parent
+        self.model_id = model_id
+        self.backend_info = backend_info or {"model_id": model_id}
+        self.label = f"{options.source}->{options.target}"
+        self.children: List["Hop"] = []
+        self.emitted = 0
+        self.tm_stats = []
+        self.meta_saved: Dict[str, int] = {}
+        self.dedup = {"occurrences": {}, "segments": 0, "chars": 0, "seconds": 0.0}
+        self.mask = [0, 0, 0]  # segments masqués, marqueurs, retraductions sans masque
+        self.prefiltered: Dict[str, int] = {}  # raison -> segments rendus sans traduction
+        self.html_repairs: Dict[str, int] = {}
+        self.prof = RunProfiler()
+        self.latencies: List[Tuple[float, Any]] = []  # (secondes, clé produit)
+        self.counts = {"reused": 0, "new": 0, "changed": 0}
+        self.pending: Dict[str, int] = {}  # ordonnanceur à budget : champ différé -> produits
+        self.pending_products = 0
+        self.options_fp = _options_fingerprint(options, _glossary_fingerprint(glossary, options.glossary_mode), model_id)
+
+        # Mode incrémental : index de la sortie précédente (lu avant d'ouvrir la sortie en écriture)
+        self.prev_by_hash, self.prev_by_source = {}, {}
+        if options.incremental:
+            self.prev_by_hash, self.prev_by_source = _load_previous_output(options.previous_output or options.output)
+        self.journal = None
+        if not options.no_journal:
+            self.journal = CheckpointJournal(options.journal or (options.output + ".journal.jsonl"),
+                                             self.options_fp, resume=options.resume)
+        # Manifeste : empreintes de la sortie précédente, lues avant qu'elle ne soit remplacée
+        self.changeset = None
+        if options.changeset:
+            self.changeset = ChangesetManifest(options.changeset, options.output,
+                                               options.previous_output or options.output)
+        self.attr_map = AttributeMap(options.attr_map, options.source, options.target) if options.attr_map else None
+        self.writer = ProductWriter(options.output, options.output_format)
+
+    def plan(self, chunk: List[Any], pos: int):
+        """Renvoie (slots déjà remplis, [(position, produit, empreinte, clé)] à traduire)."""
+        opts = self.options
+        slots: List[Any] = [None] * len(chunk)
+        todo = []
+        for j, prod in enumerate(chunk):
+            if not isinstance(prod, dict):
+                raise RuntimeError(f"Produit invalide (objet JSON attendu): {str(prod)[:80]}")
+            key = _product_key(prod, pos + j)
+            fp = product_fingerprint(prod, self.options_fp) if (opts.incremental or self.journal) else None
+            if self.journal is not None:
+                resumed = self.journal.take(key, fp)
+                if resumed is not None:
+                    slots[j] = resumed
+                    continue
+            if opts.incremental:
+                prev = self.prev_by_hash.get(fp)
+                if prev is not None:
+                    slots[j] = prev
+                    self.counts["reused"] += 1
+                    continue
+                if key in self.prev_by_source:
+                    self.counts["changed"] += 1
+                else:
+                    self.counts["new"] += 1
+            todo.append((j, prod, fp, key))
+        return slots, todo
+
+    def fill(self, slots, todo, results):
+        for (j, _, fp, key), translated in zip(todo, results):
+            if self.options.incremental:
+                translated["source_hash"] = fp
+            if self.journal is not None:
+                self.journal.record(key, fp, translated)
+            slots[j] = translated
+        return slots
+
+    def emit(self, slots, chunk):
+        """Écrit les produits traduits d'un lot ; chunk : les produits source correspondants."""
+        for src, prod in zip(chunk, slots):
+            self.writer.write(prod)
+            if self.changeset is not None:
+                self.changeset.record(prod)
+            if self.attr_map is not None:
+                self.attr_map.record(src, prod)
+        self.writer.flush()
+        if self.journal is not None:
+            self.journal.sync()
+        self.emitted += len(slots)
+
+    def close(self, completed: bool):
+        # sortie finale remplacée atomiquement uniquement si le run est allé au bout
+        self.writer.close(commit=completed)
+        if completed and self.changeset is not None:
+            self.changeset.write()
+        if completed and self.attr_map is not None:
+            self.attr_map.write()
+        if self.journal is not None:
+            self.journal.close(remove=completed)
+
+    def absorb(self, stats: Dict[str, Any], todo=()):
+        """Cumule les compteurs renvoyés par un worker pour un lot (todo : produits du lot, dans l'ordre)."""
+        self.tm_stats.append(stats["tm"])
+        if stats["prof"] is not None:
+            self.prof.absorb(stats["prof"])
+            self.latencies.extend(zip(stats["prof"]["latencies"], (t[3] for t in todo)))
+        for rule, n in stats["meta"].items():
+            self.meta_saved[rule] = self.meta_saved.get(rule, 0) + n
+        if stats["dedup"] is not None:
+            occ, segments, chars, seconds = stats["dedup"]
+            d = self.dedup
+            for seg, n in occ.items():
+                d["occurrences"][seg] = d["occurrences"].get(seg, 0) + n
+            d["segments"] += segments
+            d["chars"] += chars
+            d["seconds"] += seconds
+        if stats["mask"] is not None:
+            self.mask = [a + b for a, b in zip(self.mask, stats["mask"])]
+        for rule, n in stats["html"].items():
+            self.html_repairs[rule] = self.html_repairs.get(rule, 0) + n
+        for reason, n in (stats["prefilter"] or {}).items():
+            self.prefiltered[reason] = self.prefiltered.get(reason, 0) + n
+
+    def dedup_report(self, top: int) -> str:
+        """Segments les plus répétés du run et temps MT estimé économisé (au prorata des caractères)."""
+        d = self.dedup
+        occ = d["occurrences"]
+        total = sum(occ.values())
+        rate = d["seconds"] / d["chars"] if d["chars"] else 0.0
+        saved = sum((n - 1) * len(seg) * rate for seg, n in occ.items() if n > 1)
+        lines = [f"[DEDUP {self.label}] occurrences={total} segments distincts={len(occ)} "
+                 f"envoyés au backend={d['segments']} temps MT={d['seconds']:.1f}s économisé≈{saved:.1f}s"]
+        ranked = sorted(((n, seg) for seg, n in occ.items() if n > 1), key=lambda x: (-x[0], x[1]))[:top]
+        for rank, (n, seg) in enumerate(ranked, 1):
+            preview = seg if len(seg) <= 70 else seg[:67] + "..."
+            lines.append(f"  {rank:>3}. {n:>6}×  ≈{(n - 1) * len(seg) * rate:.2f}s  {json.dumps(preview, ensure_ascii=False)}")
+        return "\n".join(lines)
+
+    def run_report(self) -> Dict[str, Any]:
+        """Section de --report pour cette étape."""
+        lat = sorted(sec for sec, _ in self.latencies)
+        slowest = sorted(self.latencies, key=lambda x: -x[0])[:10]
+        return {
+            "label": self.label,
+            "output": self.options.output,
+            "backend": self.backend_info,
+            "products": self.emitted,
+            "translated": len(lat),
+            "segments": self.prof.segments,
+            "chars": self.prof.chars,
+            "latency_s": {
+                "mean": (sum(lat) / len(lat)) if lat else 0.0,
+                "p50": _percentile(lat, 50),
+                "p95": _percentile(lat, 95),
+                "max": lat[-1] if lat else 0.0,
+            },
+            "slowest": [{"key": key, "seconds": sec} for sec, key in slowest],
+            "chars_by_field": dict(sorted(self.prof.fields.items(), key=lambda kv: -kv[1])),
+            "stages": {k: {"calls": c, "seconds": t} for k, (c, t) in sorted(self.prof.stages.items())},
+            "mask": dict(zip(("segments", "tokens", "fallbacks"), self.mask)) if self.options.mask_tokens else None,
+            "prefilter": {r: self.prefiltered.get(r, 0) for r in PREFILTER_REASONS}
+                         if self.options.prefilter or self.options.prefilter_field else None,
+            "html_repairs": {r: self.html_repairs.get(r, 0) for r in HTML_REPAIR_RULES}
+                            if self.options.normalize_html else None,
+            "pending": {"products": self.pending_products, "fields": dict(sorted(self.pending.items()))}
+                       if self.options.deadline or self.options.max_chars else None,
+        }
+
+    def report(self):
+        o = self.options
+        if self.journal is not None and self.journal.resumed:
+            sys.stderr.write(f"[RESUME {self.label}] repris du journal={self.journal.resumed}\n")
+        if o.tm_file:
+            # éviction + résumé côté processus principal
+            tm = TranslationMemory(o.tm_file, o.source, o.target, self.model_id,
+                                   _glossary_fingerprint(self.glossary, o.glossary_mode),
+                                   readonly=o.tm_readonly, max_entries=o.tm_max_entries)
+            for st in self.tm_stats:
+                tm.absorb(st)
+            tm.close()
+            sys.stderr.write(tm.summary(self.label) + "\n")
+        if o.dedup_report > 0:
+            sys.stderr.write(self.dedup_report(o.dedup_report) + "\n")
+        if o.mask_tokens:
+            seg, tok, fb = self.mask
+            sys.stderr.write(f"[MASK {self.label}] segments masqués={seg} marqueurs={tok} retraduits sans masque={fb}\n")
+        if o.prefilter or o.prefilter_field:
+            reasons = ", ".join(f"{r}={self.prefiltered.get(r, 0)}" for r in PREFILTER_REASONS)
+            sys.stderr.write(f"[PREFILTER {self.label}] segments non traduits={sum(self.prefiltered.values())} ({reasons})\n")
+        if self.meta_saved:
+            rules = ", ".join(f"{r}={n}" for r, n in sorted(self.meta_saved.items(), key=lambda kv: -kv[1]))
+            sys.stderr.write(f"[META {self.label}] appels MT évités={sum(self.meta_saved.values())} ({rules})\n")
+        if o.normalize_html:
+            rules = ", ".join(f"{r}={self.html_repairs.get(r, 0)}" for r in HTML_REPAIR_RULES)
+            sys.stderr.write(f"[HTML {self.label}] réparations={sum(self.html_repairs.values())} ({rules})\n")
+        if self.changeset is not None:
+            sys.stderr.write(self.changeset.summary(self.label) + "\n")
+        if self.attr_map is not None:
+            sys.stderr.write(self.attr_map.summary(self.label) + "\n")
+        if o.deadline or o.max_chars:
+            fields = ", ".join(f"{f}={k}" for f, k in sorted(self.pending.items(), key=lambda kv: (-kv[1], kv[0])))
+            sys.stderr.write(f"[BUDGET {self.label}] complets={self.emitted - self.pending_products} "
+                             f"différés={self.pending_products}" + (f" ({fields})" if fields else "") + "\n")
+        if o.incremental:
+            c = self.counts
+            sys.stderr.write(f"[INCR {self.label}] réutilisés={c['reused']} retraduits={c['new'] + c['changed']} "
+                             f"(nouveaux={c['new']}, modifiés={c['changed']})\n")
+
+def run_hops(hops: List[Hop], input_path: str, chunk_size: int, executor, window: int, show_progress: bool):
+    """
+    Ordonnanceur : lit l'entrée par lots, soumet chaque lot aux étapes racines, puis, dès qu'un lot
+    d'une étape est écrit (dans l'ordre), le soumet à ses étapes filles (pivot). Au plus `window`
+    tâches en vol ; chaque sortie est écrite dans l'ordre d'entrée.
+    """
+    from collections import deque
+    from concurrent.futures import wait, FIRST_COMPLETED
+    products = iter_products(input_path)
+    pending = [deque() for _ in hops]  # par étape : (position, lot source, slots, todo, future)
+    inflight = 0
+    exhausted = False
+    pos = 0
+
+    def submit(hop: Hop, chunk: List[Any], at: int):
+        nonlocal inflight
+        slots, todo = hop.plan(chunk, at)
+        fut = executor.submit(_worker_translate_chunk, hop.index, [t[1] for t in todo])
+        pending[hop.index].append((at, chunk, slots, todo, fut))
+        inflight += 1
+
+    roots = [h for h in hops if h.parent is None]
+    while True:
+        while not exhausted and inflight < window:
+            chunk = _PROF.call("json_load", list, itertools.islice(products, chunk_size))
+            if not chunk:
+                exhausted = True
+                break
+            for hop in roots:
+                submit(hop, chunk, pos)
+            pos += len(chunk)
+        progressed = False
+        for hop in hops:
+            q = pending[hop.index]
+            while q and q[0][4].done():
+                at, chunk, slots, todo, fut = q.popleft()
+                inflight -= 1
+                results, stats = fut.result()
+                hop.absorb(stats, todo)
+                slots = hop.fill(slots, todo, results)
+                hop.emit(slots, chunk)
+                for child in hop.children:
+                    submit(child, slots, at)
+                progressed = True
+        if progressed:
+            if show_progress:
+                _print_progress(min(h.emitted for h in hops))
+            continue
+        futures = [q[0][4] for q in pending if q]
+        if not futures:
+            if exhausted:
+                return
+            continue
+        wait(futures, return_when=FIRST_COMPLETED)
+
+# ---------- Ordonnanceur à budget (--deadline / --max-chars) ----------
+def parse_deadline(text: str, now: float = None) -> float:
+    """
+    Échéance absolue (epoch) de --deadline : durée ('5400', '90m', '2h30m', '45s' ; secondes par
+    défaut) ou heure murale 'HH:MM' (prochaine occurrence : fin de la fenêtre quotidienne).
+    """
+    now = time.time() if now is None else now
+    raw = (text or "").strip().lower()
+    m = re.fullmatch(r"(\d{1,2}):(\d{2})", raw)
+    if m:
+        hh, mm = int(m.group(1)), int(m.group(2))
+        if hh > 23 or mm > 59:
+            raise RuntimeError(f"--deadline invalide '{text}' (heure HH:MM attendue).")
+        lt = time.localtime(now)
+        at = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, hh, mm, 0, 0, 0, -1))
+        return at if at > now else at + 86400
+    m = re.fullmatch(r"(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?", raw)
+    if not raw or not m:
+        raise RuntimeError(f"--deadline invalide '{text}' (attendu: secondes, 90m, 2h30m ou HH:MM).")
+    hh, mm, ss = (int(g or 0) for g in m.groups())
+    return now + hh * 3600 + mm * 60 + ss
+
+class RunBudget:
+    """
+    Budget d'un run ordonnancé : échéance (epoch, 0 = aucune) et/ou caractères traduits (segments
+    sortis de la table de dédup vers la mémoire de traduction / le modèle, 0 = illimité).
+    Vérifié avant chaque lot soumis : les lots déjà en vol se terminent (dépassement borné par la
+    fenêtre, --workers x 2 lots de --chunk-size produits). Une fois épuisé, il le reste.
+    """
+    def __init__(self, deadline: float = 0.0, max_chars: int = 0):
+        self.deadline = deadline
+        self.max_chars = max_chars
+        self.chars = 0
+        self.reason = ""
+
+    def charge(self, chars: int):
+        self.chars += chars
+
+    def exhausted(self) -> bool:
+        if not self.reason:
+            if self.deadline and time.time() >= self.deadline:
+                self.reason = "échéance"
+            elif self.max_chars and self.chars >= self.max_chars:
+                self.reason = "caractères"
+        return bool(self.reason)
+
+def _merge_tier(dst: Dict[str, Any], src: Dict[str, Any], tier: int):
+    """Reporte dans dst (produit en cours) les champs de rang `tier` traduits dans src (même produit)."""
+    for field in ("name",) + PRODUCT_HTML_FIELDS:
+        if field_tier(field) == tier and field in src:
+            dst[field] = src[field]
+    if field_tier("name") == tier and "slug" in src:
+        dst["slug"] = src["slug"]
+    if field_tier("tax") == tier and "tax" in src:
+        dst["tax"] = src["tax"]
+    meta, src_meta = dst.get("meta"), src.get("meta")
+    if isinstance(meta, dict) and isinstance(src_meta, dict):
+        for k, v in src_meta.items():
+            if field_tier("meta:" + k) == tier:
+                meta[k] = v
+
+def _defer_fields(out: Dict[str, Any], pending: List[str]):
+    """
+    Champs restés non traduits faute de budget : nom et contenus vidés, meta retirées, labels
+    d'attributs laissés tels quels ; listés dans 'pending_fields', que l'importeur n'écrit pas (la
+    valeur en base est gardée). Sans source_hash : retraduits par le run --incremental suivant.
+    """
+    meta = out.get("meta")
+    for field in pending:
+        if field.startswith("meta:"):
+            if isinstance(meta, dict):
+                meta.pop(field[5:], None)
+        elif field != "tax":
+            out[field] = ""
+    out["pending_fields"] = sorted(set(pending))
+
+def run_scheduled(hops: List[Hop], input_path: str, chunk_size: int, executor, window: int, show_progress: bool,
+                  budget: RunBudget):
+    """
+    Ordonnanceur à budget : le catalogue est chargé en entier, ordonné du produit le plus récemment
+    modifié au plus ancien, puis traduit rang de priorité par rang (FIELD_TIERS), toutes cibles
+    confondues : noms, extraits, SEO et TYPE de tout le catalogue avant le premier content_long.
+    Budget épuisé : plus aucun lot soumis, les champs restants sont différés (_defer_fields).
+    Sortie dans l'ordre d'entrée ; reprise du journal et mode incrémental comme run_hops.
+    """
+    from collections import deque
+    products = _PROF.call("json_load", list, iter_products(input_path))
+    n = len(products)
+    order = sorted(range(n), key=lambda i: str(products[i].get("modified") or ""), reverse=True)
+    keys = [_product_key(prod, i) for i, prod in enumerate(products)]
+    outputs = [[None] * n for _ in hops]  # produit définitif (journal, sortie précédente, puis fin de run)
+    states = [[None] * n for _ in hops]   # produit en cours : rangs traduits fusionnés
+    done = [[0] * n for _ in hops]        # rangs terminés (bits)
+    fps = [[None] * n for _ in hops]
+
+    # Reprise / réutilisation : étapes racines sur l'entrée, étapes pivot sur les produits repris du parent
+    for hop in hops:
+        h = hop.index
+        for i in range(n):
+            src = products[i] if hop.parent is None else outputs[hop.parent.index][i]
+            if src is None:
+                continue
+            slots, todo = hop.plan([src], i)
+            if slots[0] is not None:
+                outputs[h][i] = slots[0]
+            else:
+                fps[h][i] = todo[0][2]
+
+    queue = deque()
+    steps, total = 0, n * len(hops) * TIER_COUNT
+
+    def collect(entry):
+        nonlocal steps
+        hop, tier, idx, fut = entry
+        results, stats = fut.result()
+        if stats["dedup"] is not None:
+            budget.charge(stats["dedup"][2])
+        hop.absorb(stats, [(i, None, None, keys[i]) for i in idx])
+        h, bit = hop.index, 1 << tier
+        for i, out in zip(idx, results):
+            if states[h][i] is None:
+                states[h][i] = out
+            else:
+                _merge_tier(states[h][i], out, tier)
+            done[h][i] |= bit
+        steps += len(idx)
+        if show_progress:
+            _print_progress(steps, total)
+
+    # rang par rang ; dans un rang, lot par lot (produits récents d'abord), chaque lot passant par
+    # toutes les cibles : un budget épuisé laisse les mêmes produits à jour dans chaque langue.
+    # Budget vérifié une fois par lot : un lot commencé part vers toutes les étapes (dépassement
+    # borné à un lot par cible), sinon la récupération du parent épuiserait le budget avant l'enfant
+    for tier in range(TIER_COUNT):
+        tiers, bit = frozenset((tier,)), 1 << tier
+        for c in range(0, n, chunk_size):
+            if budget.exhausted():
+                break
+            block = order[c:c + chunk_size]
+            for hop in hops:
+                h, parent = hop.index, hop.parent
+                if parent is None:
+                    idx = [i for i in block if outputs[h][i] is None]
+                    inputs = [products[i] for i in idx]
+                else:
+                    p = parent.index
+                    # le lot du parent doit être rentré (file FIFO : tout ce qui le précède aussi)
+                    while any(e[0] is parent for e in queue):
+                        collect(queue.popleft())
+                    idx = [i for i in block if outputs[h][i] is None and (outputs[p][i] is not None or done[p][i] & bit)]
+                    inputs = [outputs[p][i] if outputs[p][i] is not None else states[p][i] for i in idx]
+                steps += len(block) - len(idx)
+                if not idx:
+                    continue
+                while len(queue) >= window:
+                    collect(queue.popleft())
+                queue.append((hop, tier, idx, executor.submit(_worker_translate_chunk, h, inputs, tiers)))
+        # barrière : le rang suivant part des produits fusionnés de celui-ci
+        while queue:
+            collect(queue.popleft())
+
+    if budget.reason:
+        sys.stderr.write(f"\n[BUDGET] épuisé ({budget.reason}) après {budget.chars} caractères traduits : "
+                         f"champs restants différés (pending_fields).\n")
+
+    full = (1 << TIER_COUNT) - 1
+    for hop in hops:
+        h, opts = hop.index, hop.options
+        for i in range(n):
+            if outputs[h][i] is not None:
+                continue
+            src = products[i] if hop.parent is None else outputs[hop.parent.index][i]
+            out = states[h][i]
+            if done[h][i] != full:
+                deferred: List[str] = []
+                fresh = translate_product(out if out is not None else src, None, opts, frozenset(), deferred)
+                out = out if out is not None else fresh
+                pending = [f for f in deferred if not (done[h][i] >> field_tier(f)) & 1]
+                if pending:
+                    _defer_fields(out, pending)
+                    for f in pending:
+                        hop.pending[f] = hop.pending.get(f, 0) + 1
+                    hop.pending_products += 1
+            if opts.incremental:
+                fp = fps[h][i]
+                if fp is None:
+                    # étape pivot : empreinte du produit parent définitif (connu seulement maintenant)
+                    fp = product_fingerprint(src, hop.options_fp)
+                    hop.counts["changed" if _product_key(src, i) in hop.prev_by_source else "new"] += 1
+                if "pending_fields" not in out:
+                    out["source_hash"] = fp
+            outputs[h][i] = out
+        for c in range(0, n, chunk_size):
+            sources = products[c:c + chunk_size] if hop.parent is None else outputs[hop.parent.index][c:c + chunk_size]
+            hop.emit(outputs[h][c:c + chunk_size], sources)
+
+def write_run_report(path: str, hops: List[Hop], started: str, wall: float, workers: int, completed: bool):
+    """Rapport JSON du run : débits globaux, temps par étape (tous processus), détail par étape src->tgt."""
+    stages: Dict[str, List[float]] = {}
+    segments = chars = translated = 0
+    hop_reports = [hop.run_report() for hop in hops]
+    for hr in hop_reports:
+        for k, st in hr["stages"].items():
+            acc = stages.setdefault(k, [0, 0.0])
+            acc[0] += st["calls"]
+            acc[1] += st["seconds"]
+        segments += hr["segments"]
+        chars += hr["chars"]
+        translated += hr["translated"]
+    # étapes restées dans le processus principal depuis le dernier lot (écriture de fin, etc.)
+    for k, (c, t) in _PROF.checkpoint()["stages"].items():
+        acc = stages.setdefault(k, [0, 0.0])
+        acc[0] += c
+        acc[1] += t
+    report = {
+        "started": started,
+        "completed": completed,
+        "wall_s": wall,
+        "workers": workers,
+        "json_backend": JSON_BACKEND,
+        "translated_products": translated,
+        "segments": segments,
+        "chars": chars,
+        "segments_per_s": segments / wall if wall else 0.0,
+        "chars_per_s": chars / wall if wall else 0.0,
+        "products_per_s": translated / wall if wall else 0.0,
+        "stages": {k: {"calls": c, "seconds": t} for k, (c, t) in sorted(stages.items())},
+        "hops": hop_reports,
+    }
+    with io.open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    sys.stderr.write(f"[REPORT] {path} : {translated} produits, {segments / wall if wall else 0.0:.1f} segments/s, "
+                     f"{chars / wall if wall else 0.0:.0f} caractères/s\n")
+
 # ---------- Main ----------
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--source", required=True, help="Code langue source (ex: fr)")
-    p.add_argument("--target", required=True, help="Code langue cible (ex: en)")
-    p.add_argument("--target-name", default="", help="Nom lisible de la langue (ex: English)")
+    p.add_argument("--source", default="", help="Code langue source (ex: fr)")
+    p.add_argument("--target", default="", help="Code(s) langue cible (ex: en, ou en,es:via=en en un seul passage)")
+    p.add_argument("--target-name", default="", help="Nom lisible de la langue (ex: English ; multi-cibles: English,Español)")
 
-    p.add_argument("--input", required=True, help="JSON d'entrée (array d'objets)")
-    p.add_argument("--output", required=True, help="JSON de sortie")
+    p.add_argument("--input", default="", help="JSON d'entrée (array d'objets)")
+    p.add_argument("--output", default="", help="JSON de sortie (multi-cibles: motif avec {lang}, ex: products_{lang}.json)")
+    p.add_argument("--output-format", choices=OUTPUT_FORMATS, default="",
+                   help="Sortie tableau : 'pretty' (indentée, défaut) ou 'compact' (un produit par ligne). .jsonl : toujours compact.")
 
     p.add_argument("--null-id", action="store_true", help="Met 'id' à null dans la sortie (création).")
     p.add_argument("--set-source-id", action="store_true", help="Copie 'id' d'origine dans 'source_id'.")
     p.add_argument("--slug-from-name", action="store_true", help="Génère le slug depuis le nom traduit.")
     p.add_argument("--emoji-mode", choices=["keep", "translate"], default="keep", help="Préserver les emojis (keep) ou les laisser passer au traducteur (translate).")
     p.add_argument("--strip-strong", action="store_true", help="Supprime les balises <strong> et </strong> avant la traduction.")
+    p.add_argument("--normalize-html", action="store_true",
+                   help="Répare le HTML pendant la traduction (<p> dans <li> déroulés, balises pendantes fermées, "
+                        "fermetures orphelines et <strong> vides retirés) : rend 'wp alprod fix-li-p' inutile après import.")
 
     # Glossaire & progress
-    p.add_argument("--glossary-file", default="", help="Fichier glossaire (JSON {src: tgt} ou lignes 'src=tgt').")
+    p.add_argument("--glossary-file", default="", help="Fichier glossaire (JSON {src: tgt} ou lignes 'src=tgt'). {lang} = cible (ex: glossary_{lang}.json).")
     p.add_argument("--glossary-pair", action="append", default=[], help="Paire 'src=tgt' (répétable).")
     p.add_argument("--glossary-mode", choices=["word", "substring"], default="word", help="Correspondance 'word' (délimitée) ou 'substring'.")
+    p.add_argument("--mask-tokens", action="store_true",
+                   help="Masque nombres + unités, prix et références (__NUMn__/__REFn__) avant traduction, restaurés "
+                        "ensuite : les segments qui ne diffèrent que par ces jetons partagent une traduction.")
+    p.add_argument("--mask-pattern", action="append", default=[],
+                   help="Regex de référence à masquer en plus (répétable, ex: 'ANDIS \\d+') ; implique --mask-tokens.")
+    p.add_argument("--prefilter", default="",
+                   help="Segments rendus sans traduction : all, ou liste parmi " + ", ".join(PREFILTER_REASONS) +
+                        " (sans lettres / marqueurs __GLSn__ seuls, URL, codes/SKU, marques, déjà dans la langue cible).")
+    p.add_argument("--prefilter-field", action="append", default=[],
+                   help="Réglage par champ 'champ=raisons' (répétable ; champ : name, content_short, content_long, "
+                        "meta:<clé>, suffixe * pour un préfixe ; raisons : all, none ou liste), ex: content_long=no_letters,url.")
+    p.add_argument("--brand-file", default="",
+                   help="Marques à ne jamais traduire quand un segment n'en contient pas plus (JSON liste, ou une par "
+                        "ligne) ; implique --prefilter brand. Remplace les entrées identité du glossaire (\"Whirlpool\": \"Whirlpool\").")
     p.add_argument("--progress", choices=["auto", "none"], default="auto", help="Barre de progression sur stderr.")
 
     p.add_argument("--translate-attr-labels", action="store_true",
                help="(désactivé par défaut) Traduire les labels des termes de la taxonomie d'attributs.")
-
+    p.add_argument("--meta-policy", default="", help="JSON de règles META (exact/prefix/regex -> translate|translate-html|copy|drop), fusionné avec la politique par défaut.")
+
+    # Mémoire de traduction
+    p.add_argument("--tm-file", default="", help="Fichier SQLite de mémoire de traduction (ex: products.tm.sqlite). Vide = désactivé.")
+    p.add_argument("--tm-readonly", action="store_true", help="Lit la mémoire de traduction sans jamais l'écrire.")
+    p.add_argument("--tm-max-entries", type=int, default=100000, help="Taille max de la mémoire (éviction LRU, 0 = illimitée).")
+
+    # Mode incrémental
+    p.add_argument("--incremental", action="store_true", help="Ne retraduit que les produits nouveaux/modifiés (empreinte 'source_hash').")
+    p.add_argument("--previous-output", default="", help="Sortie précédente à réutiliser en mode incrémental (défaut: --output).")
+    p.add_argument("--changeset", default="",
+                   help="Manifeste JSON des produits écrits (empreinte, état new/changed/unchanged face à la sortie "
+                        "précédente) pour 'alprod import --changeset=...'. {lang} = cible (ex: products_{lang}.changes.json).")
+    p.add_argument("--attr-map", default="",
+                   help="Table JSON des valeurs d'attributs distinctes (clé META, valeur source -> traduction) pour "
+                        "'alprod import --attr-map=...'. {lang} = cible (ex: products_{lang}.attrs.json).")
+
+    # Traduction par lots
+    p.add_argument("--batch-size", type=int, default=32, help="Segments par appel au backend (0 = un appel par segment, sans lots).")
+    p.add_argument("--chunk-size", type=int, default=50, help="Produits collectés par passe du moteur par lots.")
+    p.add_argument("--dedup-max-entries", type=int, default=200000,
+                   help="Taille de la table segment->traduction partagée par tout le run (0 = dédup par lot seulement).")
+    p.add_argument("--dedup-report", type=int, default=0, metavar="N",
+                   help="Affiche les N segments les plus répétés, leurs occurrences et le temps MT économisé.")
+
+    # Ordonnanceur à budget
+    p.add_argument("--deadline", default="",
+                   help="Fin de la fenêtre de traduction : durée (5400, 90m, 2h30m) ou heure HH:MM. Active l'ordonnanceur "
+                        "à budget : nom, extrait, SEO et TYPE de tout le catalogue (produits récents d'abord) avant "
+                        "content_long ; à l'échéance, les champs restants sont différés (pending_fields).")
+    p.add_argument("--max-chars", type=int, default=0,
+                   help="Budget en caractères traduits (répétitions du run non comptées) ; même ordonnanceur que --deadline.")
+
+    # Profilage
+    p.add_argument("--report", default="", help="Écrit un rapport JSON du run (segments/s, caractères/s, latences p50/p95, produits les plus lents, temps par étape).")
+    p.add_argument("--profile", default="", help="Dump cProfile du processus principal (lisible avec pstats / snakeviz).")
+    p.add_argument("--workers", type=int, default=1, help="Nombre de processus de traduction (1 = séquentiel).")
+
+    # Reprise après interruption
+    p.add_argument("--resume", action="store_true", help="Reprend un run interrompu depuis le journal (produits déjà traduits ignorés).")
+    p.add_argument("--journal", default="", help="Chemin du journal de reprise (défaut: <output>.journal.jsonl).")
+    p.add_argument("--no-journal", action="store_true", help="Désactive le journal de reprise.")
+
+    # Modèle de traduction
+    p.add_argument("--backend", choices=BACKENDS, default="argos",
+                   help="argos (défaut), ct2 (modèle CTranslate2 + SentencePiece du paquet Argos pilotés directement) "
+                        "ou http (serveur compatible LibreTranslate, --endpoint).")
+    p.add_argument("--sentencizer", choices=SENTENCIZERS, default="",
+                   help="Découpage en phrases avant le modèle : stanza (Argos, lent), rules (regex fr/en/es) ou none. "
+                        "Défaut : stanza avec argos, rules avec ct2.")
+    p.add_argument("--compute-type", choices=COMPUTE_TYPES, default="default",
+                   help="ct2 : type de calcul (int8 : nettement plus rapide sur CPU, qualité très proche).")
+    p.add_argument("--beam-size", type=int, default=4, help="ct2 : largeur du faisceau (1 = glouton, le plus rapide).")
+    p.add_argument("--inter-threads", type=int, default=1, help="ct2 : traductions en parallèle par modèle.")
+    p.add_argument("--intra-threads", type=int, default=0, help="ct2 : threads par traduction (0 = automatique).")
+    p.add_argument("--max-decoding-length", type=int, default=256, help="ct2 : tokens produits au plus par phrase.")
+    p.add_argument("--no-warmup", action="store_true", help="ct2 : pas de traduction d'échauffement au chargement.")
+    p.add_argument("--endpoint", default="", help="http : URL du serveur LibreTranslate (ex: http://192.168.1.20:5000).")
+    p.add_argument("--api-key", default="", help="http : clé d'API LibreTranslate (facultative).")
+    p.add_argument("--http-concurrency", type=int, default=4, help="http : requêtes simultanées au plus (par processus).")
+    p.add_argument("--http-batch", type=int, default=16, help="http : segments ('q') par requête.")
+    p.add_argument("--http-retries", type=int, default=3, help="http : nouvelles tentatives (réseau, 429, 5xx), attente exponentielle.")
+    p.add_argument("--http-timeout", type=float, default=30.0, help="http : délai max d'une requête (secondes).")
+
+    # Démon résident
+    p.add_argument("--serve", action="store_true",
+                   help="Démon : garde les modèles chargés et traduit pour les clients --daemon-socket (--source/--target : paires préchargées).")
+    p.add_argument("--daemon-socket", default="", help="Socket Unix du démon (avec --serve : où écouter ; sinon : traduire via ce démon).")
 
     args = p.parse_args()
-
-    # Build translator
-    translate_fn = build_translator(args.source, args.target)
-
-    # Glossary
-    g_file = _load_glossary_from_file(args.glossary_file)
-    glossary = _merge_glossary(g_file, args.glossary_pair)
-    translate_fn = make_glossary_translate_fn(translate_fn, glossary, args.glossary_mode)
+    if args.beam_size < 1 or args.max_decoding_length < 1:
+        raise RuntimeError("--beam-size et --max-decoding-length doivent être >= 1.")
+    if args.mask_pattern:
+        args.mask_tokens = True
+        compile_mask_patterns(args.mask_pattern)
+    if args.brand_file and not args.prefilter:
+        args.prefilter = "brand"
+    parse_prefilter_reasons(args.prefilter)
+    parse_prefilter_fields(args.prefilter_field)
+    args.brands = load_brand_list(args.brand_file)  # lue une fois, transmise aux workers avec les options
+    if args.backend == "http" and not args.endpoint:
+        raise RuntimeError("--backend http requiert --endpoint (ex: http://localhost:5000).")
+    budget = None
+    if args.deadline or args.max_chars:
+        if args.max_chars < 0:
+            raise RuntimeError("--max-chars doit être >= 0.")
+        if args.max_chars and args.batch_size <= 0 and args.dedup_max_entries <= 0:
+            raise RuntimeError("--max-chars compte les caractères de la table de dédup : --batch-size > 0 ou --dedup-max-entries > 0.")
+        budget = RunBudget(parse_deadline(args.deadline) if args.deadline else 0.0, args.max_chars)
+    if not args.daemon_socket or args.serve:
+        _resolve_sentencizer(args)  # --backend ct2 + --sentencizer stanza : erreur avant tout chargement
+    if args.serve:
+        if not args.daemon_socket:
+            p.error("--serve requiert --daemon-socket")
+        if args.target and not args.source:
+            p.error("--target requiert --source")
+        run_daemon(args)
+        return
+    missing = [f"--{k}" for k in ("source", "target", "input", "output") if not getattr(args, k)]
+    if missing:
+        p.error("arguments requis: " + ", ".join(missing))
+    if args.output_format == "pretty" and _is_jsonl(args.output):
+        raise RuntimeError("--output-format pretty est incompatible avec une sortie .jsonl (un produit par ligne).")
 
     # surcharge facultative depuis type_glossary.json (aucun nouvel argument CLI)
     _override = _load_type_glossary_override()
@@ -602,27 +3663,94 @@ def main():
             base = TYPE_GLOSSARY.get(key, {})
             base.update(mapping)
             TYPE_GLOSSARY[key] = base
-
-    # Load JSON
-    with io.open(args.input, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list):
-        raise RuntimeError("Le JSON d'entrée doit être une liste d'objets (produits).")
-
-    # Translate
-    out = []
-    n = len(data)
+        _TYPE_GLOSSARY_INDEX.clear()
+
+    # Politique META, partagée par toutes les étapes (et transmise aux workers avec les options)
+    args.meta_policy = load_meta_policy(args.meta_policy)
+
+    # Étapes : une par cible ; "es:via=en" traduit la sortie EN en mémoire
+    specs = parse_target_specs(args.target, args.source)
+    multi = len(specs) > 1
+    if multi and "{lang}" not in args.output:
+        raise RuntimeError("Plusieurs cibles : --output doit contenir {lang} (ex: products_{lang}.json).")
+    if multi and args.journal and "{lang}" not in args.journal:
+        raise RuntimeError("Plusieurs cibles : --journal doit contenir {lang}.")
+    if multi and args.changeset and "{lang}" not in args.changeset:
+        raise RuntimeError("Plusieurs cibles : --changeset doit contenir {lang}.")
+    if multi and args.attr_map and "{lang}" not in args.attr_map:
+        raise RuntimeError("Plusieurs cibles : --attr-map doit contenir {lang}.")
+    names = [n.strip() for n in args.target_name.split(",")] if multi else [args.target_name]
+
+    hops: List[Hop] = []
+    base_fns = []
+    for i, (code, src, parent) in enumerate(specs):
+        opts = copy.copy(args)
+        opts.source, opts.target = src, code
+        opts.target_name = names[i] if i < len(names) else ""
+        opts.output = _per_target(args.output, code)
+        opts.previous_output = _per_target(args.previous_output, code)
+        opts.journal = _per_target(args.journal, code)
+        opts.changeset = _per_target(args.changeset, code)
+        opts.attr_map = _per_target(args.attr_map, code)
+        opts.glossary_file = _per_target(args.glossary_file, code)
+
+        # Build translator (modèle chargé paresseusement en mode --workers : il ne sert qu'à l'identifiant)
+        base_fn = build_backend(opts, lazy=args.workers > 1)
+        base_fns.append(base_fn)
+
+        # Glossary
+        g_file = _load_glossary_from_file(opts.glossary_file)
+        glossary = _merge_glossary(g_file, opts.glossary_pair)
+
+        hop = Hop(i, opts, glossary, hops[parent] if parent is not None else None,
+                  getattr(base_fn, "model_id", ""), getattr(base_fn, "backend_info", None))
+        if hop.parent is not None:
+            hop.parent.children.append(hop)
+        hops.append(hop)
+
+    hop_options = [h.options for h in hops]
+    glossaries = [h.glossary for h in hops]
+    workers = max(1, args.workers)
     show_progress = (args.progress == "auto")
-    for i, prod in enumerate(data, 1):
-        out.append(translate_product(prod, translate_fn, args))
-        if show_progress:
-            _print_progress(i, n)
-    if show_progress:
-        _end_progress()
+    completed = False
+    _PROF.enabled = bool(args.report)
+    started, t_start = time.strftime("%Y-%m-%dT%H:%M:%S"), time.perf_counter()
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    def run(executor, window):
+        if budget is not None:
+            run_scheduled(hops, args.input, max(1, args.chunk_size), executor, window, show_progress, budget)
+        else:
+            run_hops(hops, args.input, max(1, args.chunk_size), executor, window, show_progress)
 
-    # Write JSON
-    with io.open(args.output, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    try:
+        if workers == 1:
+            _init_worker(hop_options, glossaries, dict(TYPE_GLOSSARY), base_fns)
+            try:
+                run(_InlineExecutor(), 1)
+            finally:
+                _close_worker()
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(hop_options, glossaries, dict(TYPE_GLOSSARY))) as pool:
+                run(pool, workers * 2)
+        if show_progress:
+            _end_progress()
+        completed = True
+    finally:
+        for hop in hops:
+            hop.close(completed)
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        for hop in hops:
+            hop.report()
+        if args.report:
+            write_run_report(args.report, hops, started, time.perf_counter() - t_start, workers, completed)
 
 if __name__ == "__main__":
     main()
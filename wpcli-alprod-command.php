@@ -7,6 +7,8 @@ class AL_Product_Importer_Command {
     private $source_id_key   = '_source_id';
     private $allowed_status  = [ 'publish','draft','pending','private','future' ];
     private $current_row_meta = [];
+    private $attr_parent_cache = []; // lang => ['MARQUE'=>tid, 'TENSION'=>tid, 'TYPE'=>tid]
+    private $attr_value_cache  = []; // "lang|parent_id|valeur" => term_id
 
 
 
@@ -191,16 +193,11 @@ class AL_Product_Importer_Command {
         // Parents FR canoniques (MAJ)
         $parents_fr = ['MARQUE','TENSION','TYPE'];
 
-        // Mapping des noms de labels cibles (par nom FR)
-        $label_map = [
-            'en' => ['MARQUE'=>'BRAND',   'TENSION'=>'VOLTAGE', 'TYPE'=>'CATEGORY'],
-            'es' => ['MARQUE'=>'MARCA',   'TENSION'=>'TENSIÓN', 'TYPE'=>'TIPO'],
-        ];
-        if (!isset($label_map[$lang])) {
+        if (!isset($this->attr_label_map[$lang])) {
             if ($debug) WP_CLI::log("[ATTR:values] Langue non gérée: {$lang}");
             return;
         }
-        $target_labels = $label_map[$lang];
+        $target_labels = $this->attr_label_map[$lang];
 
         // Valeurs (déjà traduites dans les JSON importés)
         $v1 = trim((string)get_post_meta($post_id, '_attribute1', true)); // MARQUE
@@ -211,74 +208,116 @@ class AL_Product_Importer_Command {
             return;
         }
 
-        // util: égalité insensible aux accents/casse/espaces
-        $eq = function($a,$b) {
-            $na = remove_accents(strtolower(trim((string)$a)));
-            $nb = remove_accents(strtolower(trim((string)$b)));
-            return $na === $nb;
-        };
+        // Résoudre les 3 parents (une fois par langue et par run)
+        $parent_ids = $this->attr_parents($lang, $target_labels);
+        if ($debug) WP_CLI::log("[ATTR:values] parents: ".json_encode($parent_ids));
 
-        // Trouver un terme parent par NOM (exact logique, parent=0)
-        $find_parent_by_name = function(string $name) use ($tax, $eq) {
-            $terms = get_terms([
-                'taxonomy'   => $tax,
-                'hide_empty' => false,
-                'number'     => 400,
-                'parent'     => 0,
-            ]);
-            if (is_wp_error($terms) || empty($terms)) return 0;
-            foreach ($terms as $t) {
-                if ((int)$t->parent !== 0) continue;
-                if ($eq($t->name, $name)) return (int)$t->term_id;
-            }
-            return 0;
-        };
-
-        // Résoudre le parent cible à partir du parent FR (par NOM) puis Polylang, sinon par NOM cible direct
-        $resolve_parent = function(string $fr_name, string $target_name, string $lang) use ($tax, $find_parent_by_name, $debug) {
-            // 1) trouver parent FR par NOM
-            $fr_tid = $find_parent_by_name($fr_name);
-            if ($fr_tid && function_exists('pll_get_term')) {
-                $mapped = pll_get_term($fr_tid, $lang);
-                if ($mapped) return (int)$mapped;
-            }
-            // 2) sinon trouver parent cible par NOM direct
-            $to_tid = $find_parent_by_name($target_name);
-            if ($to_tid) return (int)$to_tid;
+        // Construire la liste d’IDs valeurs à assigner
+        $value_ids = [];
+        if ($v1 !== '' && $parent_ids['MARQUE'])  $value_ids[] = $this->attr_value_term($v1, $parent_ids['MARQUE'], $lang);
+        if ($v2 !== '' && $parent_ids['TENSION']) $value_ids[] = $this->attr_value_term($v2, $parent_ids['TENSION'], $lang);
+        if ($v3 !== '' && $parent_ids['TYPE'])    $value_ids[] = $this->attr_value_term($v3, $parent_ids['TYPE'], $lang);
+        $value_ids = array_values(array_filter(array_unique($value_ids)));
 
-            // 3) fallback (optionnel) : ne pas créer automatiquement un parent
-            return 0;
-        };
+        if (empty($value_ids)) {
+            if ($debug) WP_CLI::log("[ATTR:values] Rien à assigner (parents introuvables ou valeurs vides).");
+            return;
+        }
+
+        $res = wp_set_object_terms($post_id, $value_ids, $tax, false);
+        if (is_wp_error($res)) {
+            WP_CLI::warning("[ATTR:values] Erreur assignation sur #{$post_id}: ".$res->get_error_message());
+        } else {
+            if ($debug) WP_CLI::log("[ATTR:values] Set {$tax} on #{$post_id} values=".json_encode($value_ids));
+        }
+    }
+
+    // Mapping des noms de labels cibles (par nom FR)
+    private $attr_label_map = [
+        'en' => ['MARQUE'=>'BRAND',   'TENSION'=>'VOLTAGE', 'TYPE'=>'CATEGORY'],
+        'es' => ['MARQUE'=>'MARCA',   'TENSION'=>'TENSIÓN', 'TYPE'=>'TIPO'],
+    ];
+    // Méta valeur -> parent FR canonique
+    private $attr_meta_parent = ['_attribute1'=>'MARQUE', '_attribute2'=>'TENSION', '_attribute3'=>'TYPE'];
+
+    // util: égalité insensible aux accents/casse/espaces
+    private function attr_eq($a, $b) {
+        $na = remove_accents(strtolower(trim((string)$a)));
+        $nb = remove_accents(strtolower(trim((string)$b)));
+        return $na === $nb;
+    }
+
+    // Trouver un terme parent par NOM (exact logique, parent=0)
+    private function attr_find_parent_by_name(string $name): int {
+        $terms = get_terms([
+            'taxonomy'   => 'al_product-attributes',
+            'hide_empty' => false,
+            'number'     => 400,
+            'parent'     => 0,
+        ]);
+        if (is_wp_error($terms) || empty($terms)) return 0;
+        foreach ($terms as $t) {
+            if ((int)$t->parent !== 0) continue;
+            if ($this->attr_eq($t->name, $name)) return (int)$t->term_id;
+        }
+        return 0;
+    }
+
+    // Résoudre le parent cible à partir du parent FR (par NOM) puis Polylang, sinon par NOM cible direct
+    private function attr_resolve_parent(string $fr_name, string $target_name, string $lang): int {
+        // 1) trouver parent FR par NOM
+        $fr_tid = $this->attr_find_parent_by_name($fr_name);
+        if ($fr_tid && function_exists('pll_get_term')) {
+            $mapped = pll_get_term($fr_tid, $lang);
+            if ($mapped) return (int)$mapped;
+        }
+        // 2) sinon trouver parent cible par NOM direct
+        $to_tid = $this->attr_find_parent_by_name($target_name);
+        if ($to_tid) return (int)$to_tid;
 
-        // Résoudre les 3 parents
-        $parent_ids = [
-            'MARQUE'  => $resolve_parent('MARQUE',  $target_labels['MARQUE'],  $lang),
-            'TENSION' => $resolve_parent('TENSION', $target_labels['TENSION'], $lang),
-            'TYPE'    => $resolve_parent('TYPE',    $target_labels['TYPE'],    $lang),
+        // 3) fallback (optionnel) : ne pas créer automatiquement un parent
+        return 0;
+    }
+
+    // Parents cibles des 3 labels, résolus une seule fois par langue (les labels ne changent pas pendant l'import ;
+    // un parent introuvable n'est pas mémorisé : il est recherché à nouveau au produit suivant)
+    private function attr_parents(string $lang, array $target_labels): array {
+        if (isset($this->attr_parent_cache[$lang])) return $this->attr_parent_cache[$lang];
+        $ids = [
+            'MARQUE'  => $this->attr_resolve_parent('MARQUE',  $target_labels['MARQUE'],  $lang),
+            'TENSION' => $this->attr_resolve_parent('TENSION', $target_labels['TENSION'], $lang),
+            'TYPE'    => $this->attr_resolve_parent('TYPE',    $target_labels['TYPE'],    $lang),
         ];
-        if ($debug) WP_CLI::log("[ATTR:values] parents: ".json_encode($parent_ids));
+        if (!in_array(0, $ids, true)) $this->attr_parent_cache[$lang] = $ids;
+        return $ids;
+    }
 
-        // Créer/trouver une valeur sous un parent (sans toucher au label)
-        $ensure_value_under_parent = function(string $value, int $parent_id) use ($tax) {
-            $value = trim($value);
-            if ($value === '' || !$parent_id) return 0;
+    // Créer/trouver une valeur sous un parent (sans toucher au label) ; mémorisé pour le run
+    private function attr_value_term(string $value, int $parent_id, string $lang): int {
+        $value = trim($value);
+        if ($value === '' || !$parent_id) return 0;
+        $ck = $lang.'|'.$parent_id.'|'.$value;
+        if (isset($this->attr_value_cache[$ck])) return $this->attr_value_cache[$ck];
 
-            $slug = sanitize_title($value);
+        $tax  = 'al_product-attributes';
+        $slug = sanitize_title($value);
+        $tid  = 0;
 
-            // Par slug + parent
-            $terms = get_terms([
-                'taxonomy'   => $tax,
-                'hide_empty' => false,
-                'slug'       => $slug,
-                'number'     => 20,
-            ]);
-            if (!is_wp_error($terms) && !empty($terms)) {
-                foreach ($terms as $t) {
-                    if ((int)$t->parent === $parent_id) return (int)$t->term_id;
-                }
+        // Par slug + parent
+        $terms = get_terms([
+            'taxonomy'   => $tax,
+            'hide_empty' => false,
+            'slug'       => $slug,
+            'number'     => 20,
+        ]);
+        if (!is_wp_error($terms) && !empty($terms)) {
+            foreach ($terms as $t) {
+                if ((int)$t->parent === $parent_id) { $tid = (int)$t->term_id; break; }
             }
+        }
 
-            // Par name + parent
+        // Par name + parent
+        if (!$tid) {
             $terms = get_terms([
                 'taxonomy'   => $tax,
                 'hide_empty' => false,
@@ -287,34 +326,45 @@ class AL_Product_Importer_Command {
             ]);
             if (!is_wp_error($terms) && !empty($terms)) {
                 foreach ($terms as $t) {
-                    if ((int)$t->parent === $parent_id) return (int)$t->term_id;
+                    if ((int)$t->parent === $parent_id) { $tid = (int)$t->term_id; break; }
                 }
             }
+        }
 
-            // Créer sous le parent
+        // Créer sous le parent
+        if (!$tid) {
             $ins = wp_insert_term($value, $tax, ['slug'=>$slug, 'parent'=>$parent_id]);
-            if (is_wp_error($ins)) return 0;
-            return (int)$ins['term_id'];
-        };
-
-        // Construire la liste d’IDs valeurs à assigner
-        $value_ids = [];
-        if ($v1 !== '' && $parent_ids['MARQUE'])  $value_ids[] = $ensure_value_under_parent($v1, $parent_ids['MARQUE']);
-        if ($v2 !== '' && $parent_ids['TENSION']) $value_ids[] = $ensure_value_under_parent($v2, $parent_ids['TENSION']);
-        if ($v3 !== '' && $parent_ids['TYPE'])    $value_ids[] = $ensure_value_under_parent($v3, $parent_ids['TYPE']);
-        $value_ids = array_values(array_filter(array_unique($value_ids)));
+            if (is_wp_error($ins)) return 0; // pas mémorisé : nouvel essai au produit suivant
+            $tid = (int)$ins['term_id'];
+        }
+        return $this->attr_value_cache[$ck] = $tid;
+    }
 
-        if (empty($value_ids)) {
-            if ($debug) WP_CLI::log("[ATTR:values] Rien à assigner (parents introuvables ou valeurs vides).");
+    /**
+     * Précharge la table d'attributs --attr-map (translate_products_argos.py --attr-map) :
+     * parents résolus et termes valeurs créés/retrouvés en un seul lot, une fois par valeur
+     * distincte ; les produits ne font ensuite plus aucune recherche de terme.
+     */
+    private function preload_attr_map( $path ): void {
+        if ( ! file_exists($path) ) WP_CLI::error("Attribute map not found: {$path}");
+        $doc = json_decode(file_get_contents($path), true);
+        if (json_last_error() !== JSON_ERROR_NONE || !is_array($doc) || !isset($doc['attributes']) || !is_array($doc['attributes'])) {
+            WP_CLI::error("Invalid attribute map: {$path}");
+        }
+        $lang = $this->normalize_lang_code((string)($doc['target'] ?? ''));
+        if (!isset($this->attr_label_map[$lang]) || !taxonomy_exists('al_product-attributes')) {
+            WP_CLI::warning("[ATTR-MAP] language '{$lang}' or taxonomy not handled: preload skipped.");
             return;
         }
-
-        $res = wp_set_object_terms($post_id, $value_ids, $tax, false);
-        if (is_wp_error($res)) {
-            WP_CLI::warning("[ATTR:values] Erreur assignation sur #{$post_id}: ".$res->get_error_message());
-        } else {
-            if ($debug) WP_CLI::log("[ATTR:values] Set {$tax} on #{$post_id} values=".json_encode($value_ids));
+        $parent_ids = $this->attr_parents($lang, $this->attr_label_map[$lang]);
+        $n = 0;
+        foreach ($this->attr_meta_parent as $meta_key => $parent) {
+            if (empty($doc['attributes'][$meta_key]) || !is_array($doc['attributes'][$meta_key]) || !$parent_ids[$parent]) continue;
+            foreach (array_unique(array_map('strval', array_values($doc['attributes'][$meta_key]))) as $value) {
+                if ($this->attr_value_term($value, $parent_ids[$parent], $lang)) $n++;
+            }
         }
+        WP_CLI::log("[ATTR-MAP] {$n} attribute value term(s) resolved up front ({$lang}), parents: ".json_encode($parent_ids));
     }
 
     /**
@@ -867,6 +917,8 @@ class AL_Product_Importer_Command {
         $link_sib          = isset($assoc['link-siblings']) ? (int)$assoc['link-siblings'] : 0;
         $debug_link        = isset($assoc['debug-linking']) ? (int)$assoc['debug-linking'] : 0;
         $create_suffix     = $assoc['create-slug-suffix'] ?? '';
+        $changeset         = $assoc['changeset'] ?? '';
+        $attr_map          = $assoc['attr-map'] ?? '';
 
         if ( ! $file )               WP_CLI::error("Missing --file=<path>");
         if ( ! file_exists($file) )  WP_CLI::error("File not found: {$file}");
@@ -876,6 +928,12 @@ class AL_Product_Importer_Command {
         if (json_last_error() !== JSON_ERROR_NONE) WP_CLI::error("JSON decode error: ".json_last_error_msg());
         if ( ! is_array($data) ) WP_CLI::error("JSON root must be array");
 
+        // Manifeste --changeset (translate_products_argos.py --changeset) : lignes inchangées sautées sans requête
+        $unchanged_keys = ($changeset !== '') ? $this->load_changeset_unchanged($changeset, $file) : [];
+
+        // Table d'attributs --attr-map : termes valeurs résolus en un lot avant la boucle
+        if ($attr_map !== '' && !$dry) $this->preload_attr_map($attr_map);
+
         $link_groups = [];
         $touched_src = [];
         $imported=0; $updated=0; $skipped=0; $errors=0;
@@ -890,13 +948,27 @@ class AL_Product_Importer_Command {
             $content   = (string)($row['content_long'] ?? '');
             $excerpt   = (string)($row['content_short'] ?? '');
             $meta      = (array)($row['meta'] ?? []);
+            // Champs différés par l'ordonnanceur à budget (--deadline / --max-chars) : jamais écrits
+            $pending   = array_flip(array_map('strval', (array)($row['pending_fields'] ?? [])));
+            foreach ($pending as $field => $_) {
+                if (strpos($field, 'meta:') === 0) unset($meta[substr($field, 5)]);
+            }
             $this->current_row_meta = $meta; // <— AJOUT
             $tax       = (array)($row['tax'] ?? []);
             $source_id = $row['source_id'] ?? null;
             $json_lang = isset($row['lang']) ? strtolower(trim($row['lang'])) : '';
 
+            if (isset($pending['name'])) { WP_CLI::log("[SKIP] Pending name (deferred) for row #{$idx}"); $skipped++; continue; }
             if ($name === '') { $skipped++; continue; }
 
+            if (!empty($unchanged_keys)) {
+                $row_key = $this->row_key($row, $idx);
+                if (isset($unchanged_keys[$row_key])) {
+                    WP_CLI::log("[SKIP] Unchanged (changeset) key {$row_key}");
+                    $skipped++; continue; // ni lookup, ni AFTER_WRITE
+                }
+            }
+
             $target_code = '';
             if ($json_lang) {
                 $target_code = $this->normalize_lang_code($json_lang);
@@ -959,8 +1031,8 @@ class AL_Product_Importer_Command {
                 if ($create_suffix !== '') $candidate = $this->append_suffix($candidate, $create_suffix);
                 $postarr['post_name'] = sanitize_title($candidate);
             }
-            if (!($skip_empty && $content === '')) $postarr['post_content'] = $content;
-            if (!($skip_empty && $excerpt === '')) $postarr['post_excerpt'] = $excerpt;
+            if (!isset($pending['content_long']) && !($skip_empty && $content === '')) $postarr['post_content'] = $content;
+            if (!isset($pending['content_short']) && !($skip_empty && $excerpt === '')) $postarr['post_excerpt'] = $excerpt;
 
             // ----- CREATE / UPDATE -----
             $post_id = 0; $action='create'; $actual_id = 0;
@@ -1194,6 +1266,40 @@ class AL_Product_Importer_Command {
         return $slug . $suffix;
     }
 
+    /**
+     * Clé d'une ligne, identique à celle du manifeste (_product_key côté Python) :
+     * id, sinon source_id, sinon "#<position>".
+     */
+    private function row_key( $row, $idx ) {
+        foreach (['id', 'source_id'] as $k) {
+            if (isset($row[$k]) && $row[$k] !== '') return (string)$row[$k];
+        }
+        return '#' . $idx;
+    }
+
+    /**
+     * Lit le manifeste --changeset et renvoie les clés des lignes "unchanged" (clé => true).
+     * Le manifeste décrit la sortie précédente : il suppose que celle-ci a bien été importée.
+     * Un manifeste qui ne correspond pas au --file (sha1 différent) est ignoré : tout est importé.
+     */
+    private function load_changeset_unchanged( $path, $file ) {
+        if ( ! file_exists($path) ) WP_CLI::error("Changeset not found: {$path}");
+        $cs = json_decode(file_get_contents($path), true);
+        if (json_last_error() !== JSON_ERROR_NONE || !is_array($cs) || !isset($cs['products']) || !is_array($cs['products'])) {
+            WP_CLI::error("Invalid changeset: {$path}");
+        }
+        if (!empty($cs['output_sha1']) && $cs['output_sha1'] !== sha1_file($file)) {
+            WP_CLI::warning("Changeset {$path} does not match {$file} (stale manifest?): every row will be imported.");
+            return [];
+        }
+        $keys = [];
+        foreach ($cs['products'] as $e) {
+            if (is_array($e) && ($e['status'] ?? '') === 'unchanged' && isset($e['key'])) $keys[(string)$e['key']] = true;
+        }
+        WP_CLI::log("[CHANGESET] ".count($keys)." unchanged row(s) skipped without lookup, ".(count($cs['products']) - count($keys))." to import.");
+        return $keys;
+    }
+
     private function same_text($a, $b) {
         $a = (string)$a; $b = (string)$b;
         $a = trim(str_replace("\r\n", "\n", $a));